@@ -1,8 +1,15 @@
 import os
+import copy
 import json
-from typing import List, Dict, Any
-from neo4j import GraphDatabase, RoutingControl
-from groq import Groq
+import string
+import asyncio
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, AsyncIterator, Optional, Callable
+import numpy as np
 from utils.logger import setup_logger
 from pathlib import Path
 
@@ -46,8 +53,65 @@ Return ONLY a valid JSON object. No markdown formatting outside the JSON strings
   "strategic_pivot": "A technical directive. Use the <bridge_relations> to explain how to transfer existing knowledge to the missing requirements."
 }
 </output_schema>
+
+<instruction>
+Generate the JSON response. 
+Use <bridge_relations> to populate the "strategic_pivot" section specifically.
+</instruction>
 """
 
+# Prefix caching (Groq / vLLM) only kicks in when the leading tokens are byte-identical
+# across calls: normalize once at import, keep ALL static text in the system message,
+# and only ever append the per-request context after it.
+SYSTEM_PROMPT = "\n".join(line.rstrip() for line in SYSTEM_PROMPT.strip().splitlines())
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+INSIGHT_MODEL = "llama-3.1-8b-instant"
+
+# Per-request context, compiled once. Ordered from most to least shared so the cacheable
+# prefix runs past the system message: category-level data first, the resume last.
+USER_MESSAGE_TEMPLATE = string.Template("""
+<context_data>
+<target_category>$category</target_category>
+
+<market_reality>
+  <matches>$matches</matches>
+  <misses>$misses</misses>
+</market_reality>
+
+<knowledge_graph_context>
+  <missing_concepts>$missing_concepts</missing_concepts>
+  <missing_tools_with_context>$missing_tools</missing_tools_with_context>
+  <bridge_relations>$bridge</bridge_relations>
+</knowledge_graph_context>
+
+<resume_summary>$resume_summary</resume_summary>
+</context_data>
+""".strip())
+
+FALLBACK_INSIGHT = {
+    "strength_analysis": "Could not generate analysis at this time.",
+    "hard_truth_gaps": "Unavailable due to system load.",
+    "strategic_pivot": "Focus on the skills listed in the job descriptions."
+}
+
+# The graph is rebuilt offline (nightly), so (category, skill set) -> context is stable between ingests
+GRAPH_CONTEXT_CACHE_SIZE = int(os.getenv("GRAPH_CONTEXT_CACHE_SIZE", 2048))
+
+# Semantic insight cache: a re-upload after minor edits lands within this cosine of the original
+INSIGHT_CACHE_THRESHOLD = float(os.getenv("INSIGHT_CACHE_THRESHOLD", 0.92))
+INSIGHT_CACHE_TTL_S = int(os.getenv("INSIGHT_CACHE_TTL_S", 24 * 3600))
+INSIGHT_CACHE_MAX_PER_KEY = 64
+# Distinct (category, matches, misses) buckets kept per worker; least recently used roll off
+INSIGHT_CACHE_MAX_KEYS = int(os.getenv("INSIGHT_CACHE_MAX_KEYS", 1024))
+
+# Keep-alive sockets to the Groq API shared by all requests in this worker (TLS paid once)
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", 32))
+# HTTP/2 multiplexes concurrent completions on one socket; needs the optional `h2` package
+GROQ_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Bolt connections per worker process (driver default is 100; insight traffic is light)
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", 50))
+
 # ✅ UPDATED QUERY: Uses your working Colab Logic (Anchors -> Roles -> Gaps -> Concepts)
 QUERY_CAREER_CONTEXT = """
 // --- STEP 1: IDENTIFY ANCHORS (Depth 0) ---
@@ -97,14 +161,82 @@ RETURN
 # 2. THE ENGINE CLASS
 # =========================================================
 
+class _SemanticInsightCache:
+    """
+    Near-duplicate resumes -> same LLM answer. Entries are bucketed by the exact
+    (category, matches, misses) the prompt is built from; inside a bucket the
+    resume embedding must clear `threshold` cosine. Oldest entries roll off, at most
+    `max_keys` buckets are kept (LRU), and expired entries are swept on every put.
+    Payloads are copied in and out, so callers never share (or mutate) a cached dict.
+    """
+
+    def __init__(self, threshold: float, ttl_s: int, max_per_key: int, max_keys: int):
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_per_key = max_per_key
+        self.max_keys = max_keys
+        # key -> [(ts, vec, payload)], oldest first; bucket order = least recently used first
+        self._buckets: "OrderedDict[tuple, List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, vec: np.ndarray) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entries = [e for e in self._buckets.get(key, []) if now - e[0] < self.ttl_s]
+            if not entries:
+                self._buckets.pop(key, None)
+                return None
+            self._buckets[key] = entries
+            self._buckets.move_to_end(key)
+            sims = np.stack([e[1] for e in entries]) @ vec
+            best = int(np.argmax(sims))
+            return copy.deepcopy(entries[best][2]) if sims[best] >= self.threshold else None
+
+    def put(self, key: tuple, vec: np.ndarray, payload: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            entries = self._buckets.setdefault(key, [])
+            entries.append((now, vec, copy.deepcopy(payload)))
+            del entries[:-self.max_per_key]
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+    def _sweep(self, now: float):
+        """Drops expired entries everywhere (buckets are appended in time order)."""
+        for key in list(self._buckets):
+            entries = self._buckets[key]
+            fresh = next((i for i, e in enumerate(entries) if now - e[0] < self.ttl_s), len(entries))
+            if fresh == len(entries):
+                del self._buckets[key]
+            elif fresh:
+                del entries[:fresh]
+
 class AIInsightEngine:
-    def __init__(self):
+    def __init__(self, embed_fn: Optional[Callable[[str], Any]] = None):
+        """
+        embed_fn: resume text -> normalized vector (the scorer's encoder).
+        Enables the semantic insight cache; without it every call goes to Groq.
+        """
+        # SDK imports deferred to construction (lifespan) so importing the API stays cheap
+        from neo4j import GraphDatabase
+        from groq import AsyncGroq
+        import httpx
+
         # 1. Initialize Groq
         self.groq_key = os.getenv("GROQ_API_KEY")
         if not self.groq_key:
             logger.error("❌ GROQ_API_KEY not found in environment")
             raise ValueError("GROQ_API_KEY missing")
-        self.groq_client = Groq(api_key=self.groq_key)
+        # Async client: one worker awaits many completions instead of parking a thread on each
+        self.groq_client = AsyncGroq(
+            api_key=self.groq_key,
+            http_client=httpx.AsyncClient(
+                http2=GROQ_HTTP2,
+                limits=httpx.Limits(max_keepalive_connections=GROQ_MAX_KEEPALIVE)
+            )
+        )
 
         # 2. Initialize Neo4j (Connection Only)
         self.neo4j_uri = os.getenv("NEO4J_URI")
@@ -117,144 +249,263 @@ class AIInsightEngine:
             # Note: neo4j+ssc:// in the URI handles most of this, but this is safer
             # In ai_insight.py > AIInsightEngine > __init__
 
+            # No network I/O here: connectivity is checked lazily (_ensure_connected)
+            # or by warmup() in the background, so worker boot never waits on Neo4j
             self.driver = GraphDatabase.driver(
                 self.neo4j_uri, 
                 auth=self.auth,
                 max_connection_lifetime=200, 
+                max_connection_pool_size=NEO4J_POOL_SIZE,
                 keep_alive=True 
             )
-            
-            # 🚨 CRITICAL: Verify connectivity immediately. 
-            # If this fails, we want the app to crash, not pretend it's working.
-            self.driver.verify_connectivity()
-            logger.info("✅ AIInsightEngine connected to Neo4j")
 
         except Exception as e:
-            # 🚨 FIX: Don't just log warning. RAISE the error so you know it failed.
-            logger.critical(f"❌ Neo4j Connection Failed: {e}")
+            logger.critical(f"❌ Neo4j Driver Creation Failed: {e}")
             self.driver = None
 
-    def close(self):
-        if hasattr(self, 'driver') and self.driver:
-            self.driver.close()
+        # Per-instance LRU (a class-level lru_cache would pin `self` for the process lifetime)
+        self._career_context = lru_cache(maxsize=GRAPH_CONTEXT_CACHE_SIZE)(self._query_career_context)
+        # Verified once; a failure raises and is NOT cached, so the next query retries
+        self._ensure_connected = lru_cache(maxsize=1)(self._verify_connectivity)
 
-    def _fetch_graph_context(self, user_skills: List[str], category_name: str) -> Dict[str, str]:
+        self.embed_fn = embed_fn
+        self._insight_cache = _SemanticInsightCache(
+            INSIGHT_CACHE_THRESHOLD, INSIGHT_CACHE_TTL_S, INSIGHT_CACHE_MAX_PER_KEY, INSIGHT_CACHE_MAX_KEYS
+        )
+
+    def _verify_connectivity(self) -> bool:
+        if self.driver is None:
+            raise ConnectionError("Neo4j driver not initialized")
+        self.driver.verify_connectivity()
+        logger.info("✅ AIInsightEngine connected to Neo4j")
+        return True
+
+    def warmup(self):
         """
-        Runs the Cypher query and formats the nested 'Market_Gaps' list.
+        Eager, best-effort version of the lazy first-query checks (run it off the
+        startup path): verify connectivity, then EXPLAIN QUERY_CAREER_CONTEXT so it
+        sits in Neo4j's plan cache before the first real request.
         """
-        clean_skills = [s.strip() for s in user_skills if s]
-        
+        from neo4j import READ_ACCESS
         try:
-            # Execute Query
-            records, summary, keys = self.driver.execute_query(
-                QUERY_CAREER_CONTEXT,
-                user_skills=clean_skills,
-                category_name=category_name, # We use the category name to filter the graph roles
-                database_="neo4j",
-                routing_=RoutingControl.READ
-            )
-            
-            if not records:
-                return {"missing_concepts_str": "None", "missing_tools_str": "None", "bridge_relations_str": "None"}
+            self._ensure_connected()
+            with self.driver.session(database="neo4j", default_access_mode=READ_ACCESS) as session:
+                session.run("EXPLAIN " + QUERY_CAREER_CONTEXT,
+                            user_skills=[], category_name="").consume()
+        except Exception as e:
+            logger.warning(f"⚠️ Neo4j warm-up skipped: {e}")
+
+    def _cache_probe(self, resume_text: str, category: str, matched_jobs: List[str],
+                     gap_jobs: List[str]) -> Tuple[Optional[tuple], Optional[np.ndarray], Optional[Dict]]:
+        """(key, vec, hit). key is None when caching is off or embedding failed."""
+        if self.embed_fn is None:
+            return None, None, None
+        try:
+            vec = np.asarray(self.embed_fn(resume_text), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"⚠️ Insight cache embed failed, calling LLM directly: {e}")
+            return None, None, None
+        key = (category, tuple(matched_jobs[:3]), tuple(sorted(gap_jobs)))
+        return key, vec, self._insight_cache.get(key, vec)
 
-            # Process the single best role returned
-            row = records[0].data()
-            gaps = row.get('Market_Gaps', [])
+    def invalidate_graph_cache(self):
+        """Call after a graph ingest so cached contexts don't outlive the data."""
+        self._career_context.cache_clear()
 
-            missing_concepts_list = []
-            missing_tools_list = []
-            bridge_lines = []
+    def close(self):
+        if hasattr(self, 'driver') and self.driver:
+            self.driver.close()
 
-            for gap in gaps:
-                name = gap['name']
-                n_type = gap['type']
-                concept = gap['underlying_concept']
-                
-                # Format for LLM Prompt
-                if n_type == 'Concept':
-                    missing_concepts_list.append(name)
-                else:
-                    concept_str = f" (implements {concept})" if concept else ""
-                    missing_tools_list.append(f"{name} [{n_type}]{concept_str}")
-                    
-                    # Create a "Bridge" logic
-                    if concept:
-                        bridge_lines.append(f"Missing {name} -> Requires Concept: {concept}")
-
-            return {
-                "missing_concepts_str": ", ".join(missing_concepts_list[:10]),
-                "missing_tools_str": "; ".join(missing_tools_list[:10]),
-                "bridge_relations_str": "\n".join(bridge_lines[:5])
-            }
+    async def aclose(self):
+        """close() plus the pooled Groq HTTP client (needs the event loop)."""
+        if hasattr(self, 'groq_client'):
+            await self.groq_client.close()
+        self.close()
 
+    def _fetch_graph_context(self, user_skills: List[str], category_name: str) -> Dict[str, str]:
+        """
+        Cached front for the Cypher query. Skill order/dupes don't change the result,
+        so the key is the sorted unique skill set.
+        """
+        skills_key = tuple(sorted({s.strip() for s in user_skills if s}))
+        try:
+            return self._career_context(category_name, skills_key)
         except Exception as e:
+            # Failures are not cached (lru_cache only stores returned values)
             logger.error(f"Graph Query Failed: {e}")
             return {"missing_concepts_str": "", "missing_tools_str": "", "bridge_relations_str": ""}
 
-    def _build_user_message(self, resume_text, category, matches, misses, graph_context):
-        return f"""
-<context_data>
-<target_category>{category}</target_category>
-<resume_summary>{resume_text[:1500]}</resume_summary>
+    def _query_career_context(self, category_name: str, skills_key: Tuple[str, ...]) -> Dict[str, str]:
+        """
+        Runs the Cypher query and formats the nested 'Market_Gaps' list.
+        """
+        from neo4j import RoutingControl
+
+        self._ensure_connected()
+        # Execute Query (READ -> routed to a follower/read replica on a cluster)
+        records, summary, keys = self.driver.execute_query(
+            QUERY_CAREER_CONTEXT,
+            user_skills=list(skills_key),
+            category_name=category_name, # We use the category name to filter the graph roles
+            database_="neo4j",
+            routing_=RoutingControl.READ
+        )
+        
+        if not records:
+            return {"missing_concepts_str": "None", "missing_tools_str": "None", "bridge_relations_str": "None"}
 
-<market_reality>
-  <matches>{", ".join(matches)}</matches>
-  <misses>{", ".join(misses)}</misses>
-</market_reality>
+        # Process the single best role returned
+        row = records[0].data()
+        gaps = row.get('Market_Gaps', [])
 
-<knowledge_graph_context>
-  <missing_concepts>{graph_context['missing_concepts_str']}</missing_concepts>
-  <missing_tools_with_context>{graph_context['missing_tools_str']}</missing_tools_with_context>
-  <bridge_relations>{graph_context['bridge_relations_str']}</bridge_relations>
-</knowledge_graph_context>
-</context_data>
+        missing_concepts_list = []
+        missing_tools_list = []
+        bridge_lines = []
 
-<instruction>
-Generate the JSON response. 
-Use <bridge_relations> to populate the "strategic_pivot" section specifically.
-</instruction>
-"""
+        for gap in gaps:
+            name = gap['name']
+            n_type = gap['type']
+            concept = gap['underlying_concept']
+            
+            # Format for LLM Prompt
+            if n_type == 'Concept':
+                missing_concepts_list.append(name)
+            else:
+                concept_str = f" (implements {concept})" if concept else ""
+                missing_tools_list.append(f"{name} [{n_type}]{concept_str}")
+                
+                # Create a "Bridge" logic
+                if concept:
+                    bridge_lines.append(f"Missing {name} -> Requires Concept: {concept}")
+
+        return {
+            "missing_concepts_str": ", ".join(missing_concepts_list[:10]),
+            "missing_tools_str": "; ".join(missing_tools_list[:10]),
+            "bridge_relations_str": "\n".join(bridge_lines[:5])
+        }
 
-    def generate_insight(self, resume_text: str, user_skills: List[str], 
-                         category: str, matched_jobs: List[str], 
-                         gap_jobs: List[str]) -> Dict[str, Any]:
+    def _build_user_message(self, resume_text, category, matches, misses, graph_context):
+        return USER_MESSAGE_TEMPLATE.substitute(
+            category=category,
+            matches=", ".join(matches),
+            misses=", ".join(misses),
+            missing_concepts=graph_context['missing_concepts_str'],
+            missing_tools=graph_context['missing_tools_str'],
+            bridge=graph_context['bridge_relations_str'],
+            resume_summary=resume_text[:1500]
+        )
+
+    def _completion_kwargs(self, resume_text: str, category: str, matched_jobs: List[str],
+                           gap_jobs: List[str], graph_context: Dict[str, str]) -> Dict[str, Any]:
+        """Prompt assembly shared by the blocking and streaming paths."""
+        # 2. Build Prompt
+        user_msg = self._build_user_message(
+            resume_text=resume_text,
+            category=category,
+            matches=matched_jobs[:3], 
+            misses=gap_jobs,
+            graph_context=graph_context
+        )
+
+        return dict(
+            model=INSIGHT_MODEL,
+            messages=[
+                SYSTEM_MESSAGE,  # static, cacheable prefix
+                {"role": "user", "content": user_msg}
+            ],
+            temperature=0.3,
+            max_tokens=500,
+            response_format={"type": "json_object"}
+        )
+
+    async def _prepare_request(self, resume_text: str, user_skills: List[str],
+                               category: str, matched_jobs: List[str],
+                               gap_jobs: List[str]) -> Tuple[Optional[tuple], Optional[np.ndarray],
+                                                             Optional[Dict], Optional[Dict[str, Any]]]:
+        """
+        Overlaps the two blocking lookups: the resume embedding (semantic cache probe)
+        and the Neo4j graph context run on separate threads.
+        Returns (key, vec, hit, completion kwargs); kwargs is None on a cache hit.
+        """
+        # 1. Get Graph Reasoning
+        # Note: We pass 'category' instead of 'matched_jobs' because the Graph Query
+        # now finds its OWN best matching role based on the Category Name.
+        graph_task = asyncio.ensure_future(asyncio.to_thread(self._fetch_graph_context, user_skills, category))
+
+        # 0. Semantic cache: near-duplicate resume for the same prompt context
+        key, vec, hit = await asyncio.to_thread(
+            self._cache_probe, resume_text, category, matched_jobs, gap_jobs
+        )
+        if hit is not None:
+            # Don't wait on Neo4j; the lookup finishes in the background and warms its LRU
+            return key, vec, hit, None
+
+        graph_context = await graph_task
+        return key, vec, None, self._completion_kwargs(resume_text, category, matched_jobs, gap_jobs, graph_context)
+
+    async def generate_insight(self, resume_text: str, user_skills: List[str], 
+                               category: str, matched_jobs: List[str], 
+                               gap_jobs: List[str]) -> Dict[str, Any]:
         """
-        Main entry point.
+        Main entry point. Embedding + Neo4j are blocking -> worker threads (in parallel);
+        the Groq call is awaited on the event loop.
         """
         try:
-            # 1. Get Graph Reasoning
-            # Note: We pass 'category' instead of 'matched_jobs' because the Graph Query
-            # now finds its OWN best matching role based on the Category Name.
-            graph_context = self._fetch_graph_context(user_skills, category)
-
-            # 2. Build Prompt
-            user_msg = self._build_user_message(
-                resume_text=resume_text,
-                category=category,
-                matches=matched_jobs[:3], 
-                misses=gap_jobs,
-                graph_context=graph_context
+            key, vec, hit, kwargs = await self._prepare_request(
+                resume_text, user_skills, category, matched_jobs, gap_jobs
             )
+            if hit is not None:
+                return hit
 
             # 3. Call Groq
-            completion = self.groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_msg}
-                ],
-                temperature=0.3,
-                max_tokens=500,
-                response_format={"type": "json_object"}
-            )
+            completion = await self.groq_client.chat.completions.create(**kwargs)
 
             response_content = completion.choices[0].message.content
-            return json.loads(response_content)
+            insight = json.loads(response_content)
+            if key is not None:
+                self._insight_cache.put(key, vec, insight)
+            return insight
 
         except Exception as e:
             logger.error(f"Insight Generation Failed: {e}")
-            return {
-                "strength_analysis": "Could not generate analysis at this time.",
-                "hard_truth_gaps": "Unavailable due to system load.",
-                "strategic_pivot": "Focus on the skills listed in the job descriptions."
-            }
\ No newline at end of file
+            return dict(FALLBACK_INSIGHT)
+
+    async def stream_insight(self, resume_text: str, user_skills: List[str], 
+                             category: str, matched_jobs: List[str], 
+                             gap_jobs: List[str]) -> AsyncIterator[str]:
+        """
+        Same prompt as generate_insight, but yields the JSON text as Groq produces it,
+        so the UI gets its first bytes after TTFT instead of after the full completion.
+        Concatenating the chunks gives the same JSON object generate_insight returns.
+        """
+        key, vec, hit, kwargs = await self._prepare_request(
+            resume_text, user_skills, category, matched_jobs, gap_jobs
+        )
+        if hit is not None:
+            yield json.dumps(hit)
+            return
+
+        try:
+            stream = await self.groq_client.chat.completions.create(stream=True, **kwargs)
+        except Exception as e:
+            logger.error(f"Insight Stream Failed: {e}")
+            yield json.dumps(FALLBACK_INSIGHT)
+            return
+
+        parts = []
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            # Headers are already out; the caller sees a truncated body + the log line
+            logger.error(f"Insight Stream Interrupted: {e}")
+            return
+
+        if key is not None:
+            try:
+                self._insight_cache.put(key, vec, json.loads("".join(parts)))
+            except ValueError:
+                pass  # malformed JSON from the model -> don't cache it
@@ -1,8 +1,14 @@
+import os
 import sys
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import numpy as np
+import ahocorasick
 
 # --- CI/CD Path Safety ---
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
@@ -10,7 +16,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
 from src.vector_db.client import PostgresClient
-from src.vector_db.encoder import SemanticEncoder
+from src.vector_db.encoder import SemanticEncoder, BatchedEncoder
 from src.parser.engine import ResumeParserEngine
 from utils.logger import setup_logger
 from utils.paths import BASE_DIR
@@ -23,17 +29,371 @@ JOBS_PER_CATEGORY = 5
 W_SEMANTIC = 0.60
 W_KEYWORDS = 0.25
 W_MUST_HAVE = 0.15
+# Same weights as a vector: Stage 1 candidates are scored as (n, 3) @ (3,) -> (n,)
+# with columns (semantic, keyword, must-have)
+STAGE1_WEIGHTS = np.array([W_SEMANTIC, W_KEYWORDS, W_MUST_HAVE], dtype=np.float64)
+
+# Embedding Cache (keyed by SHA-256 of the uploaded file, or text_key() when there is no file)
+# 768 x float32 = 3KB per entry -> ~12MB at the default size
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 4096))
+# Must-have vectors for the pgvector Stage 1 paths (keyed by the joined must-have text)
+MUST_HAVE_CACHE_SIZE = 4096
+
+# Micro-batching: coalesce concurrent requests into one forward pass
+EMBED_MAX_BATCH = 16
+EMBED_MAX_WAIT_S = 0.02
+
+# Inference dtype for the query encoder. fp32 by default: every stored role/job vector was
+# encoded in fp32, so queries get the same numerics. Reduced precision is opt-in, and its
+# score/ranking drift should be checked on real resumes first: "auto" (bf16 on
+# AVX512-BF16/AMX, fp16 on CUDA), "bf16", "fp16", "int8", or "onnx-int8" for the ONNX
+# Runtime int8 graph (baked by download_model_OT.py with EXPORT_ONNX_INT8=1).
+ENCODER_PRECISION = os.getenv("ENCODER_PRECISION", "fp32")
+
+# In-process job matrix: below this size, Stage 2 is a NumPy gemv instead of a pgvector query.
+# float32 on purpose: NumPy has no fp16 BLAS, fp16 gemv is ~20x slower. 50K x 768 x 4B ≈ 150MB.
+JOB_MATRIX_MAX_ROWS = int(os.getenv("JOB_MATRIX_MAX_ROWS", 50_000))
+JOB_MATRIX_FETCH_SIZE = 2_000
+JOB_EMBED_DIM = 768
+STAGE2_CANDIDATES = 20
+STAGE1_CANDIDATES = 15
+
+# Stage 2 on pgvector walks a halfvec (fp16) HNSW index -> half the bytes per distance,
+# then re-ranks this many survivors with the exact float32 distance to keep recall.
+# Widen (e.g. 200) if heavy re-posting leaves fewer than JOBS_PER_CATEGORY after DISTINCT ON.
+HALFVEC_RERANK = int(os.getenv("HALFVEC_RERANK", 50))
+
+# Without pgvector's iterative scan an HNSW walk yields at most hnsw.ef_search rows, so a
+# LIMIT above it silently truncates. Floor for the session value (PostgresClient / HNSW_EF_SEARCH).
+MIN_EF_SEARCH = max(HALFVEC_RERANK, STAGE1_CANDIDATES)
+
+# The only metadata keys a job card uses. SQL projects them with ->> so psycopg2
+# never decodes the full JSONB blob; keep in sync with the SELECT lists below.
+JOB_META_FIELDS = ("company", "link", "salary", "source", "posted_at")
+
+# Hot-path statements are PREPAREd once per pooled connection (PostgresClient.register_statement)
+# and run with EXECUTE, so Postgres parses/plans them once per session, not per request.
+#
+# Every stored embedding and query vector is L2-normalized (encoder normalize_embeddings=True),
+# so cosine == inner product: `<#>` (negative dot, served by the *_ip_ops HNSW indexes) skips
+# the per-row norms of `<=>`. Similarity = (a <#> b) * -1, ascending `<#>` = most similar first.
+
+# Stage 1 walks the fp16 role index (idx_role_anchor_hvec_ip) like Stage 2 walks the job
+# one; `sem` and the final order still come from the exact float32 column.
+#
+# Stage 1 projects only the two JSONB fields it scores with (ROLE_FIELDS), never the
+# whole full_definition blob; psycopg2 hands both back as Python lists.
+ROLE_FIELDS = """
+    COALESCE(full_definition->'resume_keywords', '[]'::jsonb) AS keywords,
+    COALESCE(full_definition->'skill_taxonomy'->'must_have', '[]'::jsonb) AS must_haves
+"""
+
+# Stage 1 + Stage 2 in one statement. The Stage 2 filter mirrors _get_job_postings:
+# first word of the role title, ILIKE against category OR job_title, then
+# DISTINCT ON (title, company) keeps the best-scoring copy of each re-posted job.
+# Only the $5 (TOP_K_CATEGORIES) best roles by cosine run the per-role job search; the
+# other candidates come back as Stage 1-only rows (with_jobs = FALSE, NULL job columns),
+# since hybrid ranking keeps just TOP_K_CATEGORIES of them. The rare winner from outside
+# that set gets its jobs from the Stage 2 batch query instead (_stage2_lookups).
+FUSED_STAGE12_QUERY = f"""
+    WITH q AS (SELECT $1::vector AS v),
+    top_roles AS (
+        SELECT job_title, {ROLE_FIELDS},
+               (anchor_embedding <#> (SELECT v FROM q)) * -1 AS sem,
+               '%' || split_part(btrim(job_title), ' ', 1) || '%' AS term
+        FROM role_definitions
+        ORDER BY anchor_embedding::halfvec(768) <#> (SELECT v FROM q)::halfvec(768)
+        LIMIT $2
+    ),
+    lead_roles AS (
+        SELECT * FROM top_roles ORDER BY sem DESC LIMIT $5
+    )
+    SELECT tr.job_title AS role_title, tr.keywords, tr.must_haves, tr.sem, TRUE AS with_jobs,
+           je.job_id, je.job_title, je.location,
+           je.company, je.link, je.salary, je.source, je.posted_at, je.conf
+    FROM lead_roles tr
+    LEFT JOIN LATERAL (
+        SELECT * FROM (
+            SELECT DISTINCT ON (lower(job_title), lower(company))
+                   job_id, job_title, location, company, link, salary, source, posted_at,
+                   (description_embedding <#> (SELECT v FROM q)) * -1 AS conf
+            FROM (
+                SELECT job_id, job_title, location,
+                       COALESCE(metadata->>'company', 'Unknown') AS company,
+                       metadata->>'link' AS link, metadata->>'salary' AS salary,
+                       metadata->>'source' AS source, metadata->>'posted_at' AS posted_at,
+                       description_embedding
+                FROM job_embeddings
+                WHERE category ILIKE tr.term OR job_title ILIKE tr.term
+                ORDER BY description_embedding::halfvec(768) <#> (SELECT v FROM q)::halfvec(768)
+                LIMIT $3
+            ) c
+            ORDER BY lower(job_title), lower(company), description_embedding <#> (SELECT v FROM q)
+        ) d
+        ORDER BY conf DESC
+        LIMIT $4
+    ) je ON TRUE
+    UNION ALL
+    SELECT job_title, keywords, must_haves, sem, FALSE,
+           NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL
+    FROM top_roles
+    WHERE job_title NOT IN (SELECT job_title FROM lead_roles)
+    ORDER BY sem DESC, conf DESC
+"""
+
+# Stage 1 only (role matrix not loaded). The CTE is inlined (PG12+) so HNSW still drives the ORDER BY.
+TOP_ROLES_QUERY = f"""
+    WITH q AS (SELECT $1::vector AS v)
+    SELECT * FROM (
+        SELECT job_title, {ROLE_FIELDS},
+               (anchor_embedding <#> q.v) * -1 as semantic_score
+        FROM role_definitions, q
+        ORDER BY anchor_embedding::halfvec(768) <#> q.v::halfvec(768)
+        LIMIT $2
+    ) c
+    ORDER BY semantic_score DESC
+"""
+
+# Stage 2 for several categories in ONE round trip: one UNNEST row per search term, each
+# LATERAL-joined to (a) its top jobs: fp16 HNSW candidates -> exact float32 re-rank (see
+# HALFVEC_RERANK) -> DISTINCT ON keeps the closest copy of each (title, company) re-post,
+# and (b) its 3 least similar jobs (the "misses"). $4 = 0 skips (a) (fused path has jobs).
+# Rows: (term_idx, is_miss, job_id, job_title, location, company, link, salary, source, posted_at, conf)
+STAGE2_BATCH_QUERY = """
+    WITH q AS (SELECT $1::vector AS v),
+    terms AS (SELECT t.term, t.i FROM unnest($2::text[]) WITH ORDINALITY AS t(term, i))
+    SELECT i, is_miss, job_id, job_title, location, company, link, salary, source, posted_at, conf
+    FROM (
+        SELECT terms.i, FALSE AS is_miss,
+               j.job_id, j.job_title, j.location, j.company, j.link, j.salary, j.source, j.posted_at, j.conf,
+               -j.conf AS sort_key
+        FROM terms
+        CROSS JOIN LATERAL (
+            SELECT * FROM (
+                SELECT DISTINCT ON (lower(job_title), lower(company))
+                    job_id, job_title, location, company, link, salary, source, posted_at,
+                    (description_embedding <#> (SELECT v FROM q)) * -1 AS conf
+                FROM (
+                    SELECT job_id, job_title, location,
+                        COALESCE(metadata->>'company', 'Unknown') AS company,
+                        metadata->>'link' AS link, metadata->>'salary' AS salary,
+                        metadata->>'source' AS source, metadata->>'posted_at' AS posted_at,
+                        description_embedding
+                    FROM job_embeddings
+                    WHERE category ILIKE terms.term OR job_title ILIKE terms.term
+                    ORDER BY description_embedding::halfvec(768) <#> (SELECT v FROM q)::halfvec(768)
+                    LIMIT $3
+                ) c
+                ORDER BY lower(job_title), lower(company), description_embedding <#> (SELECT v FROM q)
+            ) d
+            ORDER BY conf DESC
+            LIMIT $4
+        ) j
+        UNION ALL
+        SELECT terms.i, TRUE AS is_miss,
+               NULL, m.job_title, NULL, NULL, NULL, NULL, NULL, NULL, m.conf,
+               m.conf AS sort_key
+        FROM terms
+        CROSS JOIN LATERAL (
+            SELECT job_title, (description_embedding <#> (SELECT v FROM q)) * -1 AS conf
+            FROM job_embeddings
+            WHERE category ILIKE terms.term
+            ORDER BY description_embedding <#> (SELECT v FROM q) DESC
+            LIMIT 3
+        ) m
+    ) u
+    -- A UNION's own ORDER BY only takes output columns, hence the wrapping subquery + sort_key
+    -- (jobs best-first, misses worst-first)
+    ORDER BY i, is_miss, sort_key
+"""
+
+# name -> (argument types, body)
+PREPARED_STATEMENTS = {
+    "fused_stage12": ("vector, int, int, int, int", FUSED_STAGE12_QUERY),
+    "top_roles": ("vector, int", TOP_ROLES_QUERY),
+    "stage2_batch": ("vector, text[], int, int", STAGE2_BATCH_QUERY),
+}
 
 logger = setup_logger(BASE_DIR / "logs" / "scoring.log", "resume_scorer")
 
+
+def text_key(text: str) -> str:
+    """Content key for the embedding cache: same text -> same vector, whatever file it came from."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _JobMatrix:
+    """
+    Read-only RAM snapshot of job_embeddings (Struct-of-Arrays).
+    Replaced wholesale on refresh, so request threads never see a half-built matrix.
+    """
+
+    def __init__(self, rows: List[tuple], E: np.ndarray):
+        # rows: (job_id, job_title, category, location, *JOB_META_FIELDS); E: (len(rows), dim) float32
+        self.ids = [r[0] for r in rows]
+        self.titles = [r[1] for r in rows]
+        self.locations = [r[3] for r in rows]
+        # Same shape as the Stage 2 SQL projection: one tuple of JOB_META_FIELDS per job
+        self.details = [tuple(r[4:]) for r in rows]
+        self.signatures = [
+            ((t or "").lower(), (d[0] or "Unknown").lower()) for t, d in zip(self.titles, self.details)
+        ]
+        self._titles_lc = np.array([(r[1] or "").lower() for r in rows], dtype=str)
+        self._categories_lc = np.array([(r[2] or "").lower() for r in rows], dtype=str)
+
+        E = np.asarray(E, dtype=np.float32)
+        norms = np.linalg.norm(E, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        E /= norms  # in place: no second 150MB copy. cosine == dot from here on
+        self.E = np.ascontiguousarray(E)
+
+        self._match_cache: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_matching(self, term: str, include_titles: bool) -> np.ndarray:
+        """In-memory equivalent of `category ILIKE %term% [OR job_title ILIKE %term%]`."""
+        key = (term, include_titles)
+        idx = self._match_cache.get(key)
+        if idx is None:
+            mask = np.char.find(self._categories_lc, term) >= 0
+            if include_titles:
+                mask |= np.char.find(self._titles_lc, term) >= 0
+            idx = np.flatnonzero(mask)
+            self._match_cache[key] = idx
+        return idx
+
+    def similarities(self, idx: np.ndarray, resume_vector) -> np.ndarray:
+        return self.E[idx] @ np.asarray(resume_vector, dtype=np.float32)
+
+class _KeywordIndex:
+    """
+    ONE Aho-Corasick automaton over the keywords of many roles (each term tagged with
+    the roles that list it): a single pass over the resume scores every role at once,
+    instead of one substring scan per keyword per role. Scores exactly like
+    _calculate_overlap (duplicate terms count twice, blank terms always hit).
+    """
+
+    def __init__(self, term_lists: List[List[str]]):
+        n = len(term_lists)
+        self.totals = np.array([len(terms) for terms in term_lists], dtype=np.float64)
+        self.always = np.zeros(n, dtype=np.float64)  # '' in s is always True
+        postings: Dict[str, Dict[int, int]] = {}
+        for i, terms in enumerate(term_lists):
+            for t in terms:
+                t = t.strip().lower()
+                if t:
+                    role_weights = postings.setdefault(t, {})
+                    role_weights[i] = role_weights.get(i, 0) + 1
+                else:
+                    self.always[i] += 1
+
+        self.auto = None
+        if postings:
+            self.auto = ahocorasick.Automaton()
+            for t, role_weights in postings.items():
+                self.auto.add_word(t, (
+                    np.fromiter(role_weights.keys(), dtype=np.intp, count=len(role_weights)),
+                    np.fromiter(role_weights.values(), dtype=np.float64, count=len(role_weights)),
+                ))
+            self.auto.make_automaton()
+
+    def scores(self, resume_lower: str) -> np.ndarray:
+        """Keyword overlap per role, in term_lists order."""
+        counts = self.always.copy()
+        if self.auto is not None:
+            seen = set()
+            for _, (idx, weights) in self.auto.iter(resume_lower):
+                if id(idx) in seen: continue  # a term counts once, however often it occurs
+                seen.add(id(idx))
+                counts[idx] += weights
+        out = np.zeros_like(counts)
+        np.divide(counts, self.totals, out=out, where=self.totals > 0)
+        return out
+
+class _RoleMatrix:
+    """
+    Read-only RAM snapshot of role_definitions: anchors and must-have embeddings
+    stacked into float32 matrices, keywords pre-extracted from the JSONB once.
+    """
+
+    def __init__(self, rows: List[tuple], encoder):
+        # rows: (job_title, keywords, must_haves, anchor_embedding), see ROLE_FIELDS
+        self.titles = [r[0] for r in rows]
+        self.keywords = [r[1] for r in rows]
+        self.must_haves = [r[2] for r in rows]
+        self.keyword_index = _KeywordIndex(self.keywords)
+
+        A = np.asarray([r[3] for r in rows], dtype=np.float32)
+        norms = np.linalg.norm(A, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.A = np.ascontiguousarray(A / norms)
+
+        # Roles are static -> embed every must-have list ONCE here (single batch),
+        # rows without must-haves stay zero so their score clips to 0.0
+        self.M = np.zeros_like(self.A)
+        with_must = [i for i, mh in enumerate(self.must_haves) if mh]
+        if with_must:
+            vecs = encoder.encode_batch([" ".join(self.must_haves[i]) for i in with_must], as_numpy=True)
+            self.M[with_must] = np.asarray(vecs, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def top(self, resume_vector, k: int, resume_lower: str) -> tuple:
+        """In-memory `ORDER BY anchor_embedding <#> q LIMIT k` -> (titles, features), see _rank_categories."""
+        q = np.asarray(resume_vector, dtype=np.float32)
+        scores = self.A @ q
+        if k < len(scores):
+            idx = np.argpartition(-scores, k)[:k]
+        else:
+            idx = np.arange(len(scores))
+        idx = idx[np.argsort(-scores[idx])]
+        must_scores = np.clip(self.M[idx] @ q, 0.0, None)
+        kw_scores = self.keyword_index.scores(resume_lower)
+        features = np.column_stack((scores[idx], kw_scores[idx], must_scores)).astype(np.float64)
+        return [self.titles[i] for i in idx], features
+
+@lru_cache(maxsize=None)
+def get_encoder(precision: str = ENCODER_PRECISION) -> SemanticEncoder:
+    """Process-wide SemanticEncoder: the MPNet weights load once, however many services are built."""
+    return SemanticEncoder(precision=precision)
+
+@lru_cache(maxsize=1)
+def get_parser() -> ResumeParserEngine:
+    """Process-wide ResumeParserEngine (parse() is read-only, so sharing it is thread-safe)."""
+    return ResumeParserEngine()
+
 class ResumeScorerService:
-    def __init__(self):
+    def __init__(self, db: Optional[PostgresClient] = None, load_matrices: bool = True):
         try:
-            self.db = PostgresClient()
-            self.encoder = SemanticEncoder()
+            # Share the API's pooled client when given one; own a fresh one otherwise
+            self.db = db or PostgresClient()
+            self.db.require_ef_search(MIN_EF_SEARCH)
+            for name, (arg_types, body) in PREPARED_STATEMENTS.items():
+                self.db.register_statement(name, arg_types, body)
+            self.encoder = get_encoder()
+            self.batcher = BatchedEncoder(self.encoder, max_batch=EMBED_MAX_BATCH, max_wait=EMBED_MAX_WAIT_S)
             # Note: AI Engine is NOT initialized here anymore
             
-            self.parser_helper = ResumeParserEngine()
+            self.parser_helper = get_parser()
+
+            # LRU of resume vectors. FastAPI runs sync handlers in a threadpool -> lock it.
+            self._embed_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+            self._embed_lock = threading.Lock()
+            # must-have text -> float32 vector for the pgvector Stage 1 paths. Content-addressed,
+            # so a role edit just misses; bounded by the number of distinct role definitions.
+            self._must_cache: Dict[str, np.ndarray] = {}
+            self._must_lock = threading.Lock()
+
+            # load_matrices=False: the caller schedules refresh_roles/refresh_job_matrix itself
+            # (the API does, off the startup path); until they land, both stages run on pgvector
+            self._role_matrix: Optional[_RoleMatrix] = None
+            self._job_matrix: Optional[_JobMatrix] = None
+            if load_matrices:
+                self.refresh_roles()
+                self.refresh_job_matrix()
             
             logger.info("✅ ResumeScorerService initialized (Fast Mode).")
         except Exception as e:
@@ -41,10 +401,103 @@ class ResumeScorerService:
             raise RuntimeError("Could not start Resume Scorer Service") from e
 
     def close(self):
+        if hasattr(self, 'batcher') and self.batcher:
+            self.batcher.close()
         if hasattr(self, 'db') and self.db:
             self.db.close()
 
+    def refresh_roles(self):
+        """
+        (Re)loads role_definitions into RAM. The set is small and only changes on
+        role ingestion; on any failure Stage 1 stays on pgvector.
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT job_title, {ROLE_FIELDS}, anchor_embedding::real[]
+                    FROM role_definitions
+                """)
+                rows = cur.fetchall()
+
+            self._role_matrix = _RoleMatrix(rows, self.encoder) if rows else None
+            logger.info(f"✅ Role matrix loaded: {len(rows)} archetypes in RAM.")
+        except Exception as e:
+            logger.warning(f"⚠️ Role matrix load failed, falling back to pgvector: {e}")
+            self._role_matrix = None
+
+    def refresh_job_matrix(self):
+        """
+        (Re)loads job_embeddings into RAM if the corpus is small enough.
+        Call after an ingestion run; on any failure Stage 2 stays on pgvector.
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM job_embeddings")
+                (n_rows,) = cur.fetchone()
+                if n_rows > JOB_MATRIX_MAX_ROWS:
+                    logger.info(f"Job corpus too large for RAM ({n_rows} rows). Using pgvector.")
+                    self._job_matrix = None
+                    return
+
+            # Server-side cursor: the table streams in JOB_MATRIX_FETCH_SIZE chunks, and only
+            # the metadata keys we keep cross the wire (not the whole JSONB blob).
+            # WITH HOLD because pooled sessions are autocommit.
+            # Each chunk's vectors (numpy via register_vector) are copied straight into a
+            # preallocated matrix; only the metadata columns are kept as Python objects.
+            E = np.empty((n_rows, JOB_EMBED_DIM), dtype=np.float32)
+            rows: List[tuple] = []
+            with self.db.connection() as conn, conn.cursor(name="job_matrix_load", withhold=True) as cur:
+                cur.execute(f"""
+                    SELECT job_id, job_title, category, location,
+                           {", ".join(f"metadata->>'{f}'" for f in JOB_META_FIELDS)},
+                           description_embedding
+                    FROM job_embeddings
+                """)
+                while batch := cur.fetchmany(JOB_MATRIX_FETCH_SIZE):
+                    n = len(rows)
+                    if n + len(batch) > len(E):  # rows ingested since the COUNT
+                        E = np.concatenate([E, np.empty((len(batch), JOB_EMBED_DIM), dtype=np.float32)])
+                    for i, r in enumerate(batch):
+                        E[n + i] = r[-1]
+                        rows.append(r[:-1])
+
+            self._job_matrix = _JobMatrix(rows, E[:len(rows)]) if rows else None
+            logger.info(f"✅ Job matrix loaded: {len(rows)} vectors in RAM.")
+        except Exception as e:
+            logger.warning(f"⚠️ Job matrix load failed, falling back to pgvector: {e}")
+            self._job_matrix = None
+
+    def _embed(self, key: str, text: str) -> np.ndarray:
+        """
+        Returns the float32 resume vector, skipping the transformer on a cache hit.
+        Only the vector is cached, so hits still get fresh pgvector results.
+        """
+        with self._embed_lock:
+            vector = self._embed_cache.get(key)
+            if vector is not None:
+                self._embed_cache.move_to_end(key)
+                return vector
+
+        vector = np.ascontiguousarray(self.batcher.embed(text), dtype=np.float32)
+        self._cache_vector(key, vector)
+        return vector
+
+    def _cache_vector(self, key: str, vector: np.ndarray):
+        with self._embed_lock:
+            self._embed_cache[key] = vector
+            self._embed_cache.move_to_end(key)
+            if len(self._embed_cache) > EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        """
+        Content-keyed resume vector for other services (the insight cache): the text
+        scored a moment ago is a cache hit, not another transformer pass.
+        """
+        return self._embed(text_key(text), text)
+
     def _calculate_overlap(self, resume_text: str, target_terms: List[str]) -> float:
+        """Reference keyword overlap for one role; the hot path uses _KeywordIndex."""
         if not target_terms: return 0.0
         resume_lower = resume_text.lower()
         matches = [t for t in target_terms if t.strip().lower() in resume_lower]
@@ -58,174 +511,338 @@ class ResumeScorerService:
             logger.warning(f"Skill extraction failed: {e}")
             return []
 
-    def _get_category_matches(self, resume_text: str, resume_vector: List[float]) -> List[Dict]:
+    def _get_category_matches(self, resume_text: str, resume_vector: List[float],
+                              resume_lower: Optional[str] = None) -> List[Dict]:
         """Stage 1: Identify best fitting Role Archetypes."""
-        conn = self.db.connect()
-        candidates = []
         try:
-            with conn.cursor() as cur:
-                query = """
-                    SELECT job_title, full_definition, 
-                           1 - (anchor_embedding <=> %s::vector) as semantic_score
-                    FROM role_definitions
-                    ORDER BY anchor_embedding <=> %s::vector
-                    LIMIT 15;
-                """
-                cur.execute(query, (resume_vector, resume_vector))
-                rows = cur.fetchall()
-
-                for row in rows:
-                    category_title, full_def, sem_score = row
-                    keywords = full_def.get('resume_keywords', [])
-                    must_haves = full_def.get('skill_taxonomy', {}).get('must_have', [])
-
-                    kw_score = self._calculate_overlap(resume_text, keywords)
-                    
-                    if must_haves:
-                        must_have_text = " ".join(must_haves)
-                        must_have_vec = self.encoder.encode_batch([must_have_text])[0]
-                        if hasattr(must_have_vec, 'tolist'):
-                             must_have_vec = must_have_vec.tolist()
-                        dot_product = np.dot(resume_vector, must_have_vec)
-                        must_score = max(0.0, dot_product)
-                    else:
-                        must_score = 0.0
-                    
-                    final_score = (
-                        (sem_score * W_SEMANTIC) + 
-                        (kw_score * W_KEYWORDS) + 
-                        (must_score * W_MUST_HAVE)
-                    )
-
-                    candidates.append({
-                        "category": category_title,
-                        "score": round(final_score, 4),
-                        "meta": {
-                            "semantic_match": round(sem_score, 2),
-                            "keyword_match": round(kw_score, 2),
-                            "must-have_match" : round(must_score, 2)
-                        }
-                    })
-
-            candidates.sort(key=lambda x: x['score'], reverse=True)
-            return candidates[:TOP_K_CATEGORIES]
+            resume_lower = resume_lower or resume_text.lower()
+            matrix = self._role_matrix
+            if matrix is not None:
+                rows = matrix.top(resume_vector, STAGE1_CANDIDATES, resume_lower)
+            else:
+                rows = self._fetch_top_roles(resume_vector, resume_lower)
+            return self._rank_categories(rows)
         except Exception as e:
             logger.error(f"Stage 1 Failed: {e}")
             return []
-        finally:
-            conn.close()
+
+    def _rank_categories(self, candidates: tuple) -> List[Dict]:
+        """
+        Hybrid score per candidate role, as ONE matmul over the stacked features.
+        candidates: (titles, features[n, 3]) with columns (cosine, kw_score, must_score)
+        in cosine order; dicts are only built for the TOP_K_CATEGORIES winners.
+        """
+        titles, features = candidates
+        if not titles:
+            return []
+        sem, kw, must = features.T
+
+        # Rank on the rounded score, ties keep candidate (cosine) order -> same as a stable sort
+        final = np.round(features @ STAGE1_WEIGHTS, 4)
+        order = np.argsort(-final, kind="stable")[:TOP_K_CATEGORIES]
+
+        return [
+            {
+                "category": titles[i],
+                "score": float(final[i]),
+                "meta": {
+                    "semantic_match": round(float(sem[i]), 2),
+                    "keyword_match": round(float(kw[i]), 2),
+                    "must-have_match" : round(float(must[i]), 2)
+                }
+            }
+            for i in order
+        ]
+
+    def _fetch_top_roles(self, resume_vector, resume_lower: str) -> tuple:
+        """Stage 1 on pgvector (role matrix not loaded) -> (titles, features), see _rank_categories."""
+        with self.db.connection() as conn, conn.cursor() as cur:
+            cur.execute("EXECUTE top_roles(%s, %s)", (resume_vector, STAGE1_CANDIDATES))
+            rows = cur.fetchall()
+
+        return self._role_rows(rows, resume_vector, resume_lower)
+
+    def _role_rows(self, rows: List[tuple], resume_vector, resume_lower: str) -> tuple:
+        """(title, keywords, must_haves, cosine) DB rows -> (titles, features), see _rank_categories."""
+        must_texts = [" ".join(must_haves) for _, _, must_haves, _ in rows]
+        must_scores = self._must_have_scores(must_texts, resume_vector)
+
+        # Every candidate's keywords in ONE automaton -> one pass over the resume
+        kw_scores = _KeywordIndex([keywords for _, keywords, _, _ in rows]).scores(resume_lower)
+
+        sem_scores = np.array([sem_score for *_, sem_score in rows], dtype=np.float64)
+        features = np.column_stack((sem_scores, kw_scores, must_scores)).astype(np.float64)
+        return [title for title, *_ in rows], features
+
+    def _must_have_scores(self, must_texts: List[str], resume_vector) -> np.ndarray:
+        """
+        clip(must_have_vec . resume_vec, 0) per role; '' (no must-haves) scores 0.0.
+        Uncached texts go through ONE encode_batch call, then all dots are one matmul.
+        """
+        with self._must_lock:
+            vecs = {t: self._must_cache.get(t) for t in must_texts if t}
+        misses = sorted(t for t, v in vecs.items() if v is None)
+        if misses:
+            encoded = self.encoder.encode_batch(misses, as_numpy=True)
+            for t, vec in zip(misses, encoded):
+                vecs[t] = np.ascontiguousarray(vec, dtype=np.float32)
+            with self._must_lock:
+                if len(self._must_cache) + len(misses) > MUST_HAVE_CACHE_SIZE:
+                    self._must_cache.clear()
+                self._must_cache.update((t, vecs[t]) for t in misses)
+
+        scores = np.zeros(len(must_texts), dtype=np.float32)
+        with_must = [i for i, t in enumerate(must_texts) if t]
+        if with_must:
+            # float32 matvec straight to BLAS: at 15 x 768 it is ~2us, dispatch-bound;
+            # SIMD dot libraries (SimSIMD cdist) measured no faster here, so no extra dependency
+            M = np.stack([vecs[must_texts[i]] for i in with_must])
+            scores[with_must] = np.clip(M @ np.asarray(resume_vector, dtype=np.float32), 0.0, None)
+        return scores
+
+    def _get_matches_fused(self, resume_lower: str, resume_vector) -> tuple:
+        """
+        Stage 1 + Stage 2 on pgvector in ONE round trip (neither RAM matrix loaded):
+        top-15 roles, the best TOP_K_CATEGORIES of them LATERAL-joined to their top
+        (deduplicated) jobs. Hybrid ranking and the confidence floor then happen here,
+        on the already-fetched rows. Returns (top_categories, {category: jobs}) for the
+        categories whose jobs were fetched; _stage2_lookups fills in any others.
+        """
+        with self.db.connection() as conn, conn.cursor() as cur:
+            cur.execute("EXECUTE fused_stage12(%s, %s, %s, %s, %s)",
+                        (resume_vector, STAGE1_CANDIDATES, HALFVEC_RERANK, JOBS_PER_CATEGORY, TOP_K_CATEGORIES))
+            rows = cur.fetchall()
+
+        roles: "OrderedDict[str, tuple]" = OrderedDict()
+        job_rows: Dict[str, List[tuple]] = {}
+        for title, keywords, must_haves, sem, with_jobs, *job in rows:
+            if title not in roles:
+                roles[title] = (title, keywords, must_haves, sem)
+                if with_jobs:
+                    job_rows[title] = []
+            if job[0] is not None:  # LEFT JOIN: a role may have no postings
+                job_rows[title].append(job)
+
+        top_categories = self._rank_categories(self._role_rows(list(roles.values()), resume_vector, resume_lower))
+        jobs = {c['category']: self._format_job_rows(job_rows[c['category']])
+                for c in top_categories if c['category'] in job_rows}
+        return top_categories, jobs
+
+    def _format_job_rows(self, rows: List[tuple]) -> List[Dict]:
+        """
+        Confidence filter on rows already deduplicated by (title, company), best first.
+        rows: (job_id, title, location, company, link, salary, source, posted_at, score)
+        """
+        jobs = []
+        
+        for row in rows:
+            jid, title, loc, company, link, salary, source, posted_at, score = row 
+            match_percent = round(score * 100, 1)
+            if match_percent < 50.0: continue 
+
+            jobs.append({
+                "job_id": jid,
+                "title": title,
+                "location": loc,
+                "match_confidence": match_percent,
+                "posted_at": posted_at or 'Recent',
+                "company": company or 'Unknown', 
+                "apply_link": link or '#',
+                "salary": salary or 'Not Disclosed',
+                "source": source or 'External'
+            })
+            if len(jobs) >= JOBS_PER_CATEGORY: break
+        return jobs
 
     def _get_job_postings(self, category: str, resume_vector: List[float]) -> List[Dict]:
         """Stage 2: Fetch Top Matches (Successes)"""
-        conn = self.db.connect()
+        matrix = self._job_matrix
+        if matrix is not None:
+            return self._get_job_postings_in_memory(matrix, category, resume_vector)
+
+        jobs, _ = self._stage2_batch([category], resume_vector)
+        return jobs[category]
+
+    def _get_job_postings_in_memory(self, matrix: _JobMatrix, category: str, resume_vector) -> List[Dict]:
+        """Stage 2 without the DB: one gemv over the filtered rows of the RAM matrix."""
         try:
-            with conn.cursor() as cur:
-                core_term = category.split()[0] 
-                search_term = f"%{core_term}%"
-                
-                query_fuzzy = """
-                    SELECT job_id, job_title, location, metadata, 
-                        1 - (description_embedding <=> %s::vector) as match_confidence
-                    FROM job_embeddings
-                    WHERE category ILIKE %s OR job_title ILIKE %s
-                    ORDER BY description_embedding <=> %s::vector ASC
-                    LIMIT 20;
-                """
-                cur.execute(query_fuzzy, (resume_vector, search_term, search_term, resume_vector))
-                rows = cur.fetchall()
+            core_term = category.split()[0].lower()
+            idx = matrix.rows_matching(core_term, include_titles=True)
+            if idx.size == 0:
+                return []
+
+            sims = matrix.similarities(idx, resume_vector)
+            k = min(STAGE2_CANDIDATES, sims.size)
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
 
-                if not rows:
-                    # Fallback logic omitted for brevity, keep your existing one
-                    return []
-
-                jobs = []
-                seen_jobs = set()
-                
-                for row in rows:
-                    jid, title, loc, meta, score = row 
-                    match_percent = round(score * 100, 1)
-                    if match_percent < 50.0: continue 
-
-                    company = meta.get('company', 'Unknown')
-                    job_signature = f"{title.lower()}|{company.lower()}"
-                    if job_signature in seen_jobs: continue
-                    seen_jobs.add(job_signature)
-
-                    jobs.append({
-                        "job_id": jid,
-                        "title": title,
-                        "location": loc,
-                        "match_confidence": match_percent,
-                        "posted_at": meta.get('posted_at', 'Recent'),
-                        "company": company, 
-                        "apply_link": meta.get('link', '#'),
-                        "salary": meta.get('salary', 'Not Disclosed'),
-                        "source": meta.get('source', 'External')
-                    })
-                    if len(jobs) >= JOBS_PER_CATEGORY: break
-                return jobs
+            # Same (title, company) dedup the SQL path gets from DISTINCT ON
+            rows, seen = [], set()
+            for i in top:
+                j = idx[i]
+                if matrix.signatures[j] in seen: continue
+                seen.add(matrix.signatures[j])
+                rows.append((matrix.ids[j], matrix.titles[j], matrix.locations[j],
+                             *matrix.details[j], float(sims[i])))
+            return self._format_job_rows(rows)
         except Exception as e:
-            logger.error(f"Stage 2 Failed for {category}: {e}")
+            logger.error(f"Stage 2 (in-memory) Failed for {category}: {e}")
             return []
-        finally:
-            conn.close()
 
     def _get_category_misses(self, category: str, resume_vector: List[float]) -> List[str]:
         """Fetches the 'Bottom 3' jobs (Gaps)."""
-        conn = self.db.connect()
+        matrix = self._job_matrix
+        if matrix is not None:
+            idx = matrix.rows_matching(category.split()[0].lower(), include_titles=False)
+            if idx.size == 0:
+                return ["Senior Role", "Principal Engineer", "Architect"]
+            sims = matrix.similarities(idx, resume_vector)
+            return [matrix.titles[idx[i]] for i in np.argsort(sims)[:3]]
+
+        _, misses = self._stage2_batch([category], resume_vector, with_jobs=False)
+        return misses[category]
+
+    def _stage2_batch(self, categories: List[str], resume_vector, with_jobs: bool = True) -> tuple:
+        """
+        pgvector Stage 2 for all categories in ONE statement (see STAGE2_BATCH_QUERY)
+        -> ({cat: jobs}, {cat: misses}). Failures degrade to empty lists, as before.
+        """
+        search_terms = [f"%{c.split()[0]}%" for c in categories]
+        job_rows: List[List[tuple]] = [[] for _ in categories]
+        miss_titles: List[List[str]] = [[] for _ in categories]
         try:
-            with conn.cursor() as cur:
-                core_term = category.split()[0]
-                search_term = f"%{core_term}%"
-                
-                query = """
-                    SELECT job_title 
-                    FROM job_embeddings
-                    WHERE category ILIKE %s 
-                    ORDER BY description_embedding <=> %s::vector DESC
-                    LIMIT 3;
-                """
-                cur.execute(query, (search_term, resume_vector))
-                rows = cur.fetchall()
-                
-                if not rows:
-                    return ["Senior Role", "Principal Engineer", "Architect"]
-                return [row[0] for row in rows]
+            with self.db.connection() as conn, conn.cursor() as cur:
+                cur.execute("EXECUTE stage2_batch(%s, %s, %s, %s)",
+                            (resume_vector, search_terms, HALFVEC_RERANK, JOBS_PER_CATEGORY if with_jobs else 0))
+                for term_idx, is_miss, *job in cur.fetchall():
+                    if is_miss:
+                        miss_titles[term_idx - 1].append(job[1])  # ORDINALITY is 1-based
+                    else:
+                        job_rows[term_idx - 1].append(job)
         except Exception as e:
-            logger.error(f"Failed to fetch misses: {e}")
-            return []
-        finally:
-            conn.close()
+            logger.error(f"Stage 2 Failed for {categories}: {e}")
+            return {c: [] for c in categories}, {c: [] for c in categories}
+
+        jobs = {c: self._format_job_rows(rows) for c, rows in zip(categories, job_rows)}
+        misses = {
+            c: titles or ["Senior Role", "Principal Engineer", "Architect"]
+            for c, titles in zip(categories, miss_titles)
+        }
+        return jobs, misses
 
-    def get_recommendations(self, resume_text: str) -> Dict[str, Any]:
+    def _stage2_lookups(self, categories: List[str], resume_vector, jobs_by_category=None) -> tuple:
+        """
+        Jobs + misses for each top category -> ({cat: jobs}, {cat: misses}).
+        On pgvector that is one round trip for all categories (_stage2_batch);
+        against the RAM matrix they are microseconds, so they stay inline per category.
+        Jobs already in `jobs_by_category` (the fused query) are not fetched again.
+        """
+        known = jobs_by_category or {}
+        if self._job_matrix is None:
+            jobs, misses = self._stage2_batch(categories, resume_vector,
+                                              with_jobs=any(c not in known for c in categories))
+            return {**jobs, **known}, misses
+
+        jobs = {c: known[c] if c in known else self._get_job_postings(c, resume_vector) for c in categories}
+        misses = {c: self._get_category_misses(c, resume_vector) for c in categories}
+        return jobs, misses
+
+    def embed_batch(self, keys: List[str], texts: List[str]) -> List[np.ndarray]:
+        """
+        Bulk uploads: cache hits are served from the LRU, every miss goes through
+        ONE encode_batch call instead of one forward pass per resume.
+        """
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        with self._embed_lock:
+            for i, key in enumerate(keys):
+                hit = self._embed_cache.get(key)
+                if hit is not None:
+                    self._embed_cache.move_to_end(key)
+                    vectors[i] = hit
+
+        misses = [i for i, v in enumerate(vectors) if v is None]
+        if misses:
+            encoded = self.encoder.encode_batch([texts[i] for i in misses], batch_size=EMBED_MAX_BATCH, as_numpy=True)
+            with self._embed_lock:
+                for i, vec in zip(misses, encoded):
+                    vectors[i] = np.ascontiguousarray(vec, dtype=np.float32)
+                    self._embed_cache[keys[i]] = vectors[i]
+                    self._embed_cache.move_to_end(keys[i])
+                while len(self._embed_cache) > EMBED_CACHE_SIZE:
+                    self._embed_cache.popitem(last=False)
+        return vectors
+
+    def get_recommendations_batch(self, keys: List[str], texts: List[str]) -> List[Dict[str, Any]]:
+        """Scores many resumes with a single embedding pass, then the usual per-resume lookups."""
+        try:
+            vectors = self.embed_batch(keys, texts)
+        except Exception as e:
+            logger.error(f"Batch embedding failed: {e}")
+            return [{"error": "Could not process text"} for _ in texts]
+        return [self.get_recommendations(t, resume_vector=v) for t, v in zip(texts, vectors)]
+
+    def get_recommendations_cached(self, key: str, resume_text: str) -> Dict[str, Any]:
+        """Same as get_recommendations, but re-uses the embedding of a previously seen upload."""
+        return self.get_recommendations(resume_text, cache_key=key)
+
+    def get_recommendations(self, resume_text: str, cache_key: Optional[str] = None,
+                            resume_vector: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """
         FAST MODE: Only does Vector Search & Postgres lookups.
         Returns 'context_for_ai' so the Frontend can call the AI later.
         """
-        # 1. Embed
+        # 1. Embed (skipped when the caller already has the vector; cached by content otherwise)
         try:
-            resume_vector = self.encoder.encode_batch([resume_text])[0]
-            if hasattr(resume_vector, 'tolist'):
-                resume_vector = resume_vector.tolist()
+            content_key = text_key(resume_text)
+            cached_under = None
+            if resume_vector is None:
+                cached_under = cache_key or content_key
+                resume_vector = self._embed(cached_under, resume_text)
+            # float32 ndarray end-to-end: pgvector adapts it directly, no list round-trip
+            resume_vector = np.ascontiguousarray(resume_vector, dtype=np.float32)
+            # `<#>` only equals cosine for unit vectors; the encoder already normalizes,
+            # this covers vectors handed in by callers
+            norm = np.linalg.norm(resume_vector)
+            if norm > 0:
+                resume_vector = resume_vector / norm
+            if cached_under != content_key:
+                # Uploads are keyed by file sha256 (batches bring their own vectors); the
+                # insight calls that follow only have the text -> file it for embed_text()
+                self._cache_vector(content_key, resume_vector)
         except Exception as e:
             return {"error": "Could not process text"}
 
         # 2. Extract Skills (Needed for AI later)
         user_skills = self._extract_user_skills(resume_text)
 
-        # 3. Find Categories
-        top_categories = self._get_category_matches(resume_text, resume_vector)
+        # Case-folded ONCE per request; every keyword check below reuses it
+        resume_lower = resume_text.lower()
+
+        # 3. Find Categories (+ their jobs in the same round trip when both stages are on pgvector)
+        jobs_by_category = None
+        if self._role_matrix is None and self._job_matrix is None:
+            try:
+                top_categories, jobs_by_category = self._get_matches_fused(resume_lower, resume_vector)
+            except Exception as e:
+                logger.error(f"Stage 1+2 Failed: {e}")
+                top_categories = []
+        else:
+            top_categories = self._get_category_matches(resume_text, resume_vector, resume_lower)
         final_results = []
 
-        # 4. Find Jobs (NO AI CALL HERE)
+        # 4. Find Jobs + Gaps (NO AI CALL HERE)
+        jobs_by_category, misses_by_category = self._stage2_lookups(
+            [c['category'] for c in top_categories], resume_vector, jobs_by_category
+        )
+
         for cat_data in top_categories:
             category_name = cat_data['category']
             
             # A. Get Jobs
-            real_jobs = self._get_job_postings(category_name, resume_vector)
+            real_jobs = jobs_by_category[category_name]
             
             # B. Get Gaps (Still fast, just a DB lookup)
-            missed_jobs = self._get_category_misses(category_name, resume_vector)
+            missed_jobs = misses_by_category[category_name]
             
             # C. Prepare Context for Future AI Call
             matched_titles = [j['title'] for j in real_jobs[:3]]
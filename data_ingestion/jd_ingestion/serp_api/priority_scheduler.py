@@ -1,5 +1,4 @@
 # data_ingestion/jd_ingestion/serp_api/priority_scheduler.py
-import pandas as pd
 from typing import List, Dict
 import sys
 from pathlib import Path
@@ -23,8 +22,9 @@ def load_jobs_with_priority() -> List[Dict]:
     """
     try:
         with engine.connect() as conn:
-            df = pd.read_sql(text(query), conn)
-        return df.to_dict(orient="records") if not df.empty else []
+            result = conn.execute(text(query))
+            # Two columns, a few rows: plain dicts, no DataFrame round trip
+            return [{"job_title": row[0], "priority": row[1]} for row in result]
     except Exception as e:
         print(f"❌ DB Error (Jobs): {e}")
         raise e
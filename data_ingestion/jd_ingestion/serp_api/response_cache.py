@@ -0,0 +1,58 @@
+# data_ingestion/jd_ingestion/serp_api/response_cache.py
+import hashlib
+import orjson
+from sqlalchemy import text
+
+
+def response_key(job_title: str, location: str, page_token: str | None = None) -> str:
+    """Content address of one SerpAPI page request."""
+    raw = f"{job_title}|{location}|{page_token or ''}".encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Postgres-backed cache of raw SerpAPI pages, so overlapping runs on the
+    1/7/13/20/27 schedule don't pay twice for the same (job, location, page).
+    Entries older than `ttl_days` are refetched. Cache failures never fail the
+    ingestion: a broken lookup is a miss, a broken write is skipped.
+    """
+
+    def __init__(self, engine, ttl_days: int, logger):
+        self.engine = engine
+        self.ttl_days = ttl_days
+        self.logger = logger
+
+    def ensure_table(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS serpapi_responses (
+                    key CHAR(32) PRIMARY KEY,
+                    response JSONB NOT NULL,
+                    fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+            """))
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with self.engine.connect() as conn:
+                row = conn.execute(text("""
+                    SELECT response FROM serpapi_responses
+                    WHERE key = :key AND fetched_at > CURRENT_TIMESTAMP - make_interval(days => :ttl)
+                """), {"key": key, "ttl": self.ttl_days}).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            self.logger.warning(f"Response cache lookup failed (treated as miss): {e}")
+            return None
+
+    def put(self, key: str, response: dict):
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO serpapi_responses (key, response, fetched_at)
+                    VALUES (:key, CAST(:response AS JSONB), CURRENT_TIMESTAMP)
+                    ON CONFLICT (key) DO UPDATE
+                    SET response = EXCLUDED.response, fetched_at = EXCLUDED.fetched_at
+                """), {"key": key, "response": orjson.dumps(response).decode("utf-8")})
+        except Exception as e:
+            self.logger.warning(f"Response cache write failed: {e}")
@@ -1,8 +1,61 @@
 import os
-from serpapi import GoogleSearch
+import random
+import asyncio
+import aiohttp
 
+# Same endpoint the serpapi SDK's GoogleSearch.get_dict() calls, hit directly so
+# requests can share one async session (keep-alive + DNS cache)
+SERPAPI_URL = "https://serpapi.com/search.json"
 
-def fetch_jobs(
+# Transient 429s are retried with exponential backoff + full jitter (or the
+# server's Retry-After); a spent monthly quota is fatal and is never retried
+RATE_LIMIT_ATTEMPTS = 4
+RATE_LIMIT_BACKOFF = 1.0       # seconds, doubles per attempt
+RATE_LIMIT_MAX_BACKOFF = 30.0
+
+
+class RateLimitError(RuntimeError):
+    """429 burst from SerpAPI; `retry_after` is the server's hint in seconds, if any."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _is_quota_error(message: str) -> bool:
+    msg = message.lower()
+    return "run out of searches" in msg or "quota" in msg
+
+
+def _retry_after(header: str | None) -> float | None:
+    """Retry-After in delta-seconds form (what SerpAPI sends); dates are ignored."""
+    try:
+        return max(0.0, float(header)) if header else None
+    except ValueError:
+        return None
+
+
+async def fetch_jobs(
+    session: aiohttp.ClientSession,
+    keyword: str,
+    location: str,
+    page_token: str | None = None
+) -> dict:
+    """One google_jobs page, riding out short 429 bursts (see RATE_LIMIT_ATTEMPTS)."""
+    for attempt in range(RATE_LIMIT_ATTEMPTS):
+        try:
+            return await _fetch_page(session, keyword, location, page_token)
+        except RateLimitError as e:
+            if attempt == RATE_LIMIT_ATTEMPTS - 1:
+                raise
+            delay = e.retry_after
+            if delay is None:
+                delay = random.uniform(0, min(RATE_LIMIT_MAX_BACKOFF, RATE_LIMIT_BACKOFF * 2 ** attempt))
+            await asyncio.sleep(min(delay, RATE_LIMIT_MAX_BACKOFF))
+
+
+async def _fetch_page(
+    session: aiohttp.ClientSession,
     keyword: str,
     location: str,
     page_token: str | None = None
@@ -24,13 +77,31 @@ def fetch_jobs(
     if page_token:
         params["next_page_token"] = page_token
 
-    search = GoogleSearch(params)
-    result = search.get_dict()
+    status = None  # stays None if session.get() itself raises (e.g. InvalidURL, a ValueError)
+    try:
+        async with session.get(SERPAPI_URL, params=params) as resp:
+            status = resp.status
+            retry_after = _retry_after(resp.headers.get("Retry-After"))
+            # SerpAPI reports errors as JSON with a non-200 status
+            result = await resp.json(content_type=None)
+    except ValueError as e:
+        if status == 429:  # throttled by a proxy/edge with a non-JSON body
+            raise RateLimitError("429 Too Many Requests", retry_after) from e
+        raise RuntimeError(f"SerpAPI request failed: {e}") from e
+    except aiohttp.ClientError as e:
+        raise RuntimeError(f"SerpAPI request failed: {e}") from e
+    except asyncio.TimeoutError as e:
+        # ClientTimeout expiry is not a ClientError; surface it like any failed request
+        raise RuntimeError("SerpAPI request failed: timed out") from e
+
+    error = result.get("error") if isinstance(result, dict) else None
+    if status == 429 and not (error and _is_quota_error(error)):
+        raise RateLimitError(f"429 Too Many Requests: {error or ''}".strip(), retry_after)
 
     if not result:
         raise RuntimeError("Empty response from SerpAPI")
 
-    if "error" in result:
-        raise RuntimeError(result["error"])
+    if error:
+        raise RuntimeError(error)
 
     return result
@@ -1,7 +1,10 @@
-import json
+import orjson
+import asyncio
+import aiohttp
 import yaml
 import os
 import mlflow
+import pandas as pd
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
@@ -19,6 +22,9 @@ from utils.paths import get_raw_run_dir, get_log_path, PARAMS_PATH
 from utils.logger import setup_logger
 from priority_scheduler import load_jobs_with_priority, load_active_locations
 from serpapi_client import fetch_jobs
+from response_cache import ResponseCache, response_key
+from utils.db import get_db_engine
+from data_ingestion.processors.process_data import extract_jobs, new_raw_columns, RAW_ROWS_FILE, RAW_ROWS_MANIFEST
 
 def load_params():
     """Safety check to ensure params exist"""
@@ -40,19 +46,129 @@ def slice_locations(locations: list, priority: str) -> list:
     else:
         return locations
 
+# One C-level pass instead of four chained str.replace copies
+_SAFE_TABLE = str.maketrans({" ": "_", ",": None, "/": "_", "\\": "_"})
+
 def safe_filename(text: str) -> str:
-    return (
-        text.replace(" ", "_")
-            .replace(",", "")
-            .replace("/", "_")
-            .replace("\\", "_")
-    )
+    return text.translate(_SAFE_TABLE)
+
+async def run_ingestion(jobs, all_locations, max_api_calls, max_concurrency, raw_dir, logger, cache=None) -> dict:
+    """
+    Fetches every (job, location) pair concurrently, at most `max_concurrency`
+    requests in flight over one shared session. Pages of one pair stay sequential
+    (each needs the previous next_page_token). The API budget and the stop
+    conditions (quota / rate limit / budget) are shared by all pairs.
+    Pages found in `cache` (a ResponseCache) are reused and cost no API call.
+    """
+    stats = {"api_calls": 0, "cache_hits": 0, "pages": 0, "total_jobs": 0, "stop_reason": "completed"}
+    rows = new_raw_columns()  # flattened as pages arrive, so processing needn't re-read the JSON
+    pages_written = []  # filenames behind `rows` -> RAW_ROWS_MANIFEST
+    reserved = 0  # calls in flight + calls made; kept <= max_api_calls
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    def halt(reason: str):
+        if not stop.is_set():
+            stats["stop_reason"] = reason
+            stop.set()
+
+    async def crawl(session, job_title: str, location: str):
+        nonlocal reserved
+        page_token = None
+
+        while True:
+            key = response_key(job_title, location, page_token)
+            response = await asyncio.to_thread(cache.get, key) if cache else None
+
+            if response is not None:
+                if stop.is_set(): return
+                stats["cache_hits"] += 1
+                logger.info(f"Cache hit (no API call) | {job_title} @ {location}")
+            else:
+                async with semaphore:
+                    if stop.is_set(): return
+                    if reserved >= max_api_calls:
+                        logger.warning("API call limit reached")
+                        halt("api_limit_reached")
+                        return
+                    reserved += 1
+
+                    try:
+                        response = await fetch_jobs(session, job_title, location, page_token)
+                    except RuntimeError as e:
+                        reserved -= 1  # failed calls don't count against the budget
+                        msg = str(e).lower()
+                        if "run out of searches" in msg or "quota" in msg:
+                            logger.warning("Quota reached! Stopping entire ingestion.")
+                            halt("quota_exceeded")
+                        elif "429" in msg or "too many requests" in msg:
+                            # fetch_jobs already backed off and retried; still throttled -> stop
+                            logger.error("SerpAPI rate limit hit")
+                            halt("serpapi_rate_limit")
+                        else:
+                            logger.error(f"Non-fatal SerpAPI error: {e}")
+                        return
+
+                stats["api_calls"] += 1
+                logger.info(f"API Progress: {stats['api_calls']}/{max_api_calls} | {job_title} @ {location}")
+                if cache:
+                    await asyncio.to_thread(cache.put, key, response)
+
+            stats["pages"] += 1
+            page_no = stats["pages"]
+
+            # --- SAVE RAW JSON ---
+            # Compact orjson bytes (no indent), written off the event loop so other
+            # crawls keep fetching while this one hits the disk
+            filename = f"{safe_filename(job_title)}_{safe_filename(location)}_p{page_no}.json"
+            await asyncio.to_thread((raw_dir / filename).write_bytes, orjson.dumps(response))
+            pages_written.append(filename)
+
+            n_jobs = extract_jobs(response, rows)
+            stats["total_jobs"] += n_jobs
+            logger.info(f"Saved {n_jobs} jobs to {filename}")
+
+            page_token = response.get("next_page_token")
+            if not page_token or stop.is_set():
+                return
+
+    # Same (job, location) order as the old nested loop; the semaphore admits them in order
+    # Only three distinct slices exist -> build them once, not once per job
+    slices = {tier: slice_locations(all_locations, tier) for tier in ("High", "Medium", "Low")}
+    pairs = []
+    for job in jobs:
+        locations = slices.get(job["priority"], all_locations)  # Dynamically slice based on DB priority
+        logger.info(f"Job='{job['job_title']}' | Priority={job['priority']} | Locations={len(locations)}")
+        pairs += [(job["job_title"], location) for location in locations]
+
+    connector = aiohttp.TCPConnector(limit=max_concurrency, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        # return_exceptions: one crawl blowing up must not cancel the rest, or lose the rows
+        # and stats gathered so far
+        results = await asyncio.gather(
+            *(crawl(session, title, location) for title, location in pairs), return_exceptions=True
+        )
+    for (title, location), result in zip(pairs, results):
+        if isinstance(result, Exception):
+            logger.error(f"Crawl failed | {title} @ {location}: {result!r}")
+
+    # The manifest goes first and comes back last: a crash in between leaves no manifest,
+    # and processing falls back to the JSON pages instead of trusting a partial parquet
+    (raw_dir / RAW_ROWS_MANIFEST).unlink(missing_ok=True)
+    if rows["job_id"]:
+        pd.DataFrame(rows).to_parquet(raw_dir / RAW_ROWS_FILE, compression="zstd", index=False)
+        (raw_dir / RAW_ROWS_MANIFEST).write_text("\n".join(sorted(pages_written)), encoding="utf-8")
+        logger.info(f"Wrote {len(rows['job_id'])} flattened rows to {RAW_ROWS_FILE}")
+
+    return stats
 
 def main():
     load_dotenv() 
 
     params = load_params()
     MAX_API_CALLS = params["serpapi_ingestion"]["max_api_calls"]
+    MAX_CONCURRENCY = params["serpapi_ingestion"].get("max_concurrency", 10)
+    CACHE_TTL_DAYS = params["serpapi_ingestion"].get("cache_ttl_days", 6)
 
     tracking_uri = os.getenv("MLFLOW_TRACKING_URI")
     if not tracking_uri:
@@ -87,77 +203,24 @@ def main():
         logger.error(f"Failed to connect to RDS: {e}")
         sys.exit(1)
 
-    api_calls = 0
-    total_jobs = 0
-    stop_reason = "completed"
-    should_stop = False
+    # --- RESPONSE CACHE (optional: ingestion runs uncached if it can't be set up) ---
+    cache = None
+    if CACHE_TTL_DAYS > 0:
+        try:
+            cache = ResponseCache(get_db_engine(), CACHE_TTL_DAYS, logger)
+            cache.ensure_table()
+        except Exception as e:
+            logger.warning(f"Response cache unavailable, fetching everything: {e}")
+            cache = None
 
     with mlflow.start_run(run_name=f"serpapi_{run_month}"):
-        for job in jobs:
-            if should_stop: break
-
-            job_title = job["job_title"]
-            priority = job["priority"]
-
-            # Dynamically slice based on DB priority
-            locations = slice_locations(all_locations, priority)
-
-            logger.info(
-                f"Job='{job_title}' | Priority={priority} | Locations={len(locations)}"
-            )
-
-            for location in locations:
-                if should_stop: break
-                page_token = None
-
-                while True:
-                    if api_calls >= MAX_API_CALLS:
-                        stop_reason = "api_limit_reached"
-                        logger.warning("API call limit reached")
-                        should_stop = True
-                        break
-
-                    try:
-                        response = fetch_jobs(job_title, location, page_token)
-                        api_calls += 1
-                        logger.info(f"API Progress: {api_calls}/{MAX_API_CALLS} | {job_title} @ {location}")
-                    
-                    except RuntimeError as e:
-                        msg = str(e).lower()
-                        if "run out of searches" in msg or "quota" in msg:
-                            logger.warning("Quota reached! Stopping entire ingestion.")
-                            stop_reason = "quota_exceeded"
-                            should_stop = True
-                        elif "429" in msg or "too many requests" in msg:
-                            logger.error("SerpAPI rate limit hit")
-                            stop_reason = "serpapi_rate_limit"
-                            should_stop = True
-                        else:
-                            logger.error(f"Non-fatal SerpAPI error: {e}")
-                        break
-                    
-                    if should_stop: break
-
-                    # --- SAVE RAW JSON ---
-                    filename = f"{safe_filename(job_title)}_{safe_filename(location)}_p{api_calls}.json"
-                    with open(raw_dir / filename, "w", encoding="utf-8") as f:
-                        json.dump(response, f, ensure_ascii=False, indent=2)
-
-                    batch = response.get("jobs_results", [])
-                    total_jobs += len(batch)
-                    logger.info(f"Saved {len(batch)} jobs to {filename}")
-
-                    page_token = response.get("next_page_token")
-                    if not page_token:
-                        break
-
-                if should_stop: break
-            if should_stop: break
+        stats = asyncio.run(run_ingestion(jobs, all_locations, MAX_API_CALLS, MAX_CONCURRENCY, raw_dir, logger, cache))
 
         mlflow.log_param("run_month", run_month)
-        mlflow.log_param("stop_reason", stop_reason)
-        mlflow.log_metric("api_calls", api_calls)
-        mlflow.log_metric("jobs_fetched", total_jobs)
+        mlflow.log_param("stop_reason", stats["stop_reason"])
+        mlflow.log_metric("api_calls", stats["api_calls"])
+        mlflow.log_metric("cache_hits", stats["cache_hits"])
+        mlflow.log_metric("jobs_fetched", stats["total_jobs"])
 
     logger.info("Ingestion finished successfully.")
 
@@ -1,13 +1,39 @@
 import io
-import docx
+import zipfile
+from lxml import etree
 from .base_ingestor import BaseIngestor
 
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = f"{{{W_NS}}}"
+
+# Same content python-docx's doc.paragraphs yields: body-level <w:p>, their direct runs
+# (and runs inside hyperlinks), and the run children that render as text
+_BODY_PARAGRAPHS = etree.XPath("/w:document/w:body/w:p", namespaces={"w": W_NS})
+_RUN_CONTENT = etree.XPath(
+    "(w:r | w:hyperlink/w:r)/*[self::w:t or self::w:tab or self::w:ptab or self::w:br"
+    " or self::w:cr or self::w:noBreakHyphen]",
+    namespaces={"w": W_NS},
+)
+# Uploads are untrusted: never expand entities (XXE), same as python-docx's own parser
+_PARSER = etree.XMLParser(resolve_entities=False)
+
+_FIXED_TEXT = {f"{_W}tab": "\t", f"{_W}ptab": "\t", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+
+def _run_text(e) -> str:
+    if e.tag == f"{_W}t":
+        return e.text or ""
+    if e.tag == f"{_W}br":
+        # Only line breaks are text; page/column breaks render as ""
+        return "\n" if e.get(f"{_W}type", "textWrapping") == "textWrapping" else ""
+    return _FIXED_TEXT[e.tag]
+
 class DOCXIngestor(BaseIngestor):
     def extract(self, file_content: bytes) -> str:
-        """Wraps bytes in a BytesIO stream for python-docx compatibility."""
+        """Reads word/document.xml straight from the zip with lxml (no python-docx object tree)."""
         try:
-            stream = io.BytesIO(file_content)
-            doc = docx.Document(stream)
-            return "\n".join([p.text for p in doc.paragraphs]).strip()
+            with zipfile.ZipFile(io.BytesIO(file_content)) as z:
+                root = etree.fromstring(z.read("word/document.xml"), _PARSER)
+            paragraphs = ("".join(map(_run_text, _RUN_CONTENT(p))) for p in _BODY_PARAGRAPHS(root))
+            return "\n".join(paragraphs).strip()
         except Exception as e:
-            raise ValueError(f"Failed to parse DOCX: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Failed to parse DOCX: {str(e)}")
@@ -1,4 +1,6 @@
 import sys
+import importlib
+from functools import lru_cache
 from pathlib import Path
 
 # 1. Reach the Root
@@ -8,24 +10,36 @@ ROOT = Path(__file__).resolve().parent.parent.parent
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-# 2. Absolute Imports from Root
-from data_ingestion.resume_ingestion.pdf_ingest import PDFIngestor
-from data_ingestion.resume_ingestion.docx_ingest import DOCXIngestor
-from data_ingestion.resume_ingestion.txt_ingestor import TXTIngestor
-
 class IngestorFactory:
-    _ingestors = {
-        ".pdf": PDFIngestor(),
-        ".docx": DOCXIngestor(),
-        ".txt": TXTIngestor()
+    # Backends are imported on first use: a TXT-only worker never loads fitz / python-docx
+    # (and an OCR backend like PaddleOCR would cost seconds of import + model RAM)
+    _backends = {
+        ".pdf": ("data_ingestion.resume_ingestion.pdf_ingest", "PDFIngestor"),
+        ".docx": ("data_ingestion.resume_ingestion.docx_ingest", "DOCXIngestor"),
+        ".txt": ("data_ingestion.resume_ingestion.txt_ingestor", "TXTIngestor")
     }
+    _ingestors = {}  # normalized extension -> instance, filled lazily
 
     @classmethod
+    @lru_cache(maxsize=16)  # Only a handful of extensions exist; repeat lookups become a dict hit
     def get_ingestor(cls, extension: str):
         ext = extension.lower()
         if not ext.startswith("."): ext = f".{ext}"
-        
+
         ingestor = cls._ingestors.get(ext)
-        if not ingestor:
-            raise ValueError(f"Unsupported file type: {ext}")
-        return ingestor
\ No newline at end of file
+        if ingestor is None:
+            backend = cls._backends.get(ext)
+            if not backend:
+                raise ValueError(f"Unsupported file type: {ext}")
+            module_path, class_name = backend
+            ingestor = getattr(importlib.import_module(module_path), class_name)()
+            # setdefault: two threads racing on a cold extension still share one instance
+            ingestor = cls._ingestors.setdefault(ext, ingestor)
+        return ingestor
+
+def extract_text(file_bytes: bytes, extension: str) -> str:
+    """
+    Module-level entry point so it can be shipped to a ProcessPoolExecutor worker
+    (bound methods on the factory would drag the class state through pickle).
+    """
+    return IngestorFactory.get_ingestor(extension).extract(file_bytes)
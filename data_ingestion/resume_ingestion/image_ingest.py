@@ -1,22 +1,34 @@
-"""from paddleocr import PaddleOCR
-from .base_ingestor import BaseIngestor
+"""from .base_ingestor import BaseIngestor
 import numpy as np
 import cv2
 
-# Initialize once (Global scope or Singleton pattern recommended for Prod)
-ocr_engine = PaddleOCR(use_angle_cls=True, lang='en', show_log=False)
+# Images per predict() call: one detector/recognizer pass amortized over the whole batch
+OCR_BATCH_SIZE = 8
+
+def _decode(file_bytes: bytes):
+    # Convert bytes to numpy array for OpenCV (frombuffer = no bytearray copy)
+    return cv2.imdecode(np.frombuffer(file_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
 
 class ImageIngestor(BaseIngestor):
-    def extract(self, file_bytes) -> str:
-        # Convert bytes to numpy array for OpenCV
-        file_bytes = np.asarray(bytearray(file_bytes.read()), dtype=np.uint8)
-        img = cv2.imdecode(file_bytes, 1)
-        
-        result = ocr_engine.ocr(img, cls=True)
-        
-        extracted_text = []
-        if result[0]:
-            for line in result[0]:
-                extracted_text.append(line[1][0]) # line[1][0] is the text
-        
-        return "\n".join(extracted_text)"""
\ No newline at end of file
+    # Built on first OCR request, not at import: importing PaddlePaddle + loading weights
+    # costs seconds and would otherwise block API boot. Then stays resident on the GPU.
+    _engine = None
+
+    @classmethod
+    def _get_engine(cls):
+        if cls._engine is None:
+            from paddleocr import PaddleOCR  # PaddleOCR 3.x: predict() takes a list of images
+            cls._engine = PaddleOCR(use_textline_orientation=True, lang='en', device="gpu", text_recognition_batch_size=16)
+        return cls._engine
+
+    def extract(self, file_bytes: bytes) -> str:
+        return self.extract_batch([file_bytes])[0]
+
+    def extract_batch(self, files: list) -> list:
+        texts = []
+        for i in range(0, len(files), OCR_BATCH_SIZE):
+            images = [_decode(b) for b in files[i:i + OCR_BATCH_SIZE]]
+            for res in self._get_engine().predict(images):
+                texts.append("\n".join(res["rec_texts"]))  # one entry per detected text line
+
+        return texts"""
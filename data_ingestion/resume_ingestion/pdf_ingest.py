@@ -4,10 +4,10 @@ from .base_ingestor import BaseIngestor
 class PDFIngestor(BaseIngestor):
     def extract(self, file_content: bytes) -> str:
         """Extracts text from PDF bytes using PyMuPDF."""
-        text = ""
         # We pass the bytes directly to the stream parameter
         with fitz.open(stream=file_content, filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text() + "\n"
-        
-        return text.strip()
\ No newline at end of file
+            # Collect pages and join once (no quadratic `text +=`). Default "text" flags
+            # already skip images, so there is no traversal left to switch off.
+            pages = [page.get_text() for page in doc]
+
+        return "\n".join(pages).strip()
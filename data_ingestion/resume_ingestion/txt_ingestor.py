@@ -1,15 +1,19 @@
 from .base_ingestor import BaseIngestor
 
+MAX_TXT_BYTES = 1_000_000
+
 class TXTIngestor(BaseIngestor):
     def extract(self, file_content: bytes) -> str:
         """Decodes raw bytes into a string with error handling."""
         try:
-            # Safety: Resumes are never huge; truncate if someone sends a 100MB txt
-            if len(file_content) > 1_000_000:
-                file_content = file_content[:1_000_000]
+            # Already text (e.g. a caller that decoded upstream): nothing to decode
+            if isinstance(file_content, str):
+                return file_content[:MAX_TXT_BYTES].strip()
 
+            # Safety: Resumes are never huge; truncate if someone sends a 100MB txt.
+            # memoryview slice = no copy of the first 1 MB; str() decodes straight from the buffer
             # Use errors="ignore" to prevent crashing on weird hidden characters
-            return file_content.decode("utf-8", errors="ignore").strip()
+            return str(memoryview(file_content)[:MAX_TXT_BYTES], "utf-8", "ignore").strip()
             
         except Exception as e:
             # Raise exception instead of returning string to keep data clean
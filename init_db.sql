@@ -3,6 +3,8 @@
 -- =============================================
 -- Enable pgvector for semantic search
 CREATE EXTENSION IF NOT EXISTS vector;
+-- Trigram indexes for the leading-wildcard ILIKE filters in Stage 2
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- =============================================
 -- 2. MASTER ANCHOR TABLE (role_definitions)
@@ -18,9 +20,18 @@ CREATE TABLE IF NOT EXISTS role_definitions (
 );
 
 -- Indexes for Role Definitions
--- Fast semantic search for roles
-CREATE INDEX IF NOT EXISTS idx_role_anchor_vec 
-    ON role_definitions USING hnsw (anchor_embedding vector_cosine_ops);
+-- Fast semantic search for roles.
+-- Embeddings are L2-normalized at ingest, so the API ranks by inner product (<#>):
+-- same order as cosine without the per-row norm computation.
+-- Built on the fp16 (halfvec) cast, like idx_job_desc_hvec_ip below: half the bytes per
+-- distance in the graph walk; the API takes exact scores from the float32 column.
+-- m / ef_construction above pgvector's defaults (16 / 64): a few dozen anchors, built
+-- once, queried on every resume -> favour recall (kept in sync with ingest_job_categories.py).
+DROP INDEX IF EXISTS idx_role_anchor_vec;
+DROP INDEX IF EXISTS idx_role_anchor_ip;
+CREATE INDEX IF NOT EXISTS idx_role_anchor_hvec_ip 
+    ON role_definitions USING hnsw ((anchor_embedding::halfvec(768)) halfvec_ip_ops)
+    WITH (m = 32, ef_construction = 200);
 
 -- Fast filtering by JSON properties
 CREATE INDEX IF NOT EXISTS idx_role_full_def_gin 
@@ -41,10 +52,23 @@ CREATE TABLE IF NOT EXISTS job_embeddings (
 );
 
 -- Indexes for Job Embeddings
--- Critical: HNSW Index for finding similar jobs instantly
-CREATE INDEX IF NOT EXISTS idx_job_desc_vec 
-    ON job_embeddings USING hnsw (description_embedding vector_cosine_ops);
+-- Critical: HNSW Index for finding similar jobs instantly.
+-- Built on the fp16 (halfvec) cast: half the bytes per distance during the graph walk.
+-- The API re-ranks the top candidates with the exact float32 column (requires pgvector >= 0.7).
+-- Inner-product ops for the same reason as idx_role_anchor_hvec_ip.
+DROP INDEX IF EXISTS idx_job_desc_vec;
+DROP INDEX IF EXISTS idx_job_desc_hvec;
+CREATE INDEX IF NOT EXISTS idx_job_desc_hvec_ip 
+    ON job_embeddings USING hnsw ((description_embedding::halfvec(768)) halfvec_ip_ops);
 
 -- Index for cleanup/filtering by month
 CREATE INDEX IF NOT EXISTS idx_job_ingest_month 
-    ON job_embeddings (ingestion_month);
\ No newline at end of file
+    ON job_embeddings (ingestion_month);
+
+-- Stage 2 filters with `category ILIKE '%term%' OR job_title ILIKE '%term%'`.
+-- B-trees can't serve a leading wildcard; trigram GIN can (BitmapOr of both).
+CREATE INDEX IF NOT EXISTS idx_job_category_trgm 
+    ON job_embeddings USING gin (category gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_job_title_trgm 
+    ON job_embeddings USING gin (job_title gin_trgm_ops);
\ No newline at end of file
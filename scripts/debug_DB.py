@@ -44,5 +44,41 @@ def check_alignment():
             
     conn.close()
 
+def explain_role_search(limit: int = 15):
+    """
+    One-shot EXPLAIN (ANALYZE, BUFFERS) of the Stage 1 role ranking, using a stored anchor
+    as the query vector. Look for 'Index Scan using idx_role_anchor_hvec_ip' (with only a few
+    dozen roles the planner may still prefer a Seq Scan, which is fine at that size).
+    """
+    db = PostgresClient()
+    conn = db.connect()
+
+    with conn.cursor() as cur:
+        print("\n🔍 --- ROLE HNSW PLAN ---")
+        cur.execute("SET hnsw.ef_search = %s", (db.hnsw_ef_search,))
+        cur.execute("SELECT anchor_embedding FROM role_definitions LIMIT 1;")
+        row = cur.fetchone()
+        if not row:
+            print("⚠️ role_definitions is empty. Run the role ingestion first.")
+            conn.close()
+            return
+
+        cur.execute("""
+            EXPLAIN (ANALYZE, BUFFERS)
+            SELECT job_title FROM role_definitions
+            ORDER BY anchor_embedding::halfvec(768) <#> %s::halfvec(768)
+            LIMIT %s;
+        """, (row[0], limit))
+        plan = "\n".join(r[0] for r in cur.fetchall())
+        print(plan)
+        print(f"\nhnsw.ef_search = {db.hnsw_ef_search}")
+        if "idx_role_anchor_hvec_ip" in plan:
+            print("✅ HNSW index used.")
+        else:
+            print("ℹ️ HNSW index not used for this query.")
+
+    conn.close()
+
 if __name__ == "__main__":
-    check_alignment()
\ No newline at end of file
+    check_alignment()
+    explain_role_search()
\ No newline at end of file
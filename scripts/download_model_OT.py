@@ -1,5 +1,6 @@
-#seed script --> runs only once here we pair up the mpnet model to our backend using DVC 
+#seed script --> runs only once here we pair up the mpnet model to our backend using DVC
 
+import os
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
 
@@ -8,18 +9,45 @@ print("🚀 DEBUG: Script has started...")
 # 2. Define the path relative to the root
 MODEL_PATH = PROJECT_ROOT / "models" / "all-mpnet-base-v2"
 
+# "fp16" bakes half-precision weights: ~half the artifact size and load I/O (fp32 consumers
+# upcast on load). Opt-in: it rounds the weights, so vectors drift slightly from the fp32
+# ones already stored in Postgres -> re-ingest jobs/roles after switching.
+MODEL_SAVE_DTYPE = os.getenv("MODEL_SAVE_DTYPE", "fp32")
+
+# "1" also writes a dynamic int8 ONNX graph (VNNI GEMM kernels) into MODEL_PATH/onnx/, served
+# with ENCODER_PRECISION=onnx-int8. Needs `pip install "sentence-transformers[onnx]"` (optimum).
+EXPORT_ONNX_INT8 = os.getenv("EXPORT_ONNX_INT8", "0") == "1"
+
+def export_onnx_int8():
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    # Exports the fp32 torch weights to ONNX, then quantizes the Linear weights to int8
+    onnx_model = SentenceTransformer(str(MODEL_PATH), backend="onnx", device="cpu")
+    export_dynamic_quantized_onnx_model(onnx_model, "avx512_vnni", str(MODEL_PATH))
+    print(f"✅ int8 ONNX graph written to: {MODEL_PATH / 'onnx'}")
+
 def bake_model():
     # Ensure the directory exists
     MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
-    
+
     print(f"🔥 Baking model to {MODEL_PATH}...")
-    
+
     # This downloads the model from HF
     model = SentenceTransformer("all-mpnet-base-v2")
-    
+
+    if MODEL_SAVE_DTYPE == "fp16":
+        model.half()
+    elif MODEL_SAVE_DTYPE != "fp32":
+        raise ValueError(f"Unknown MODEL_SAVE_DTYPE: {MODEL_SAVE_DTYPE}")
+
     # This saves it LOCALLY as a self-contained artifact
     model.save(str(MODEL_PATH))
-    print(f"✅ Model downloaded to: {MODEL_PATH}")
+    print(f"✅ Model ({MODEL_SAVE_DTYPE}) downloaded to: {MODEL_PATH}")
+
+    if EXPORT_ONNX_INT8:
+        if MODEL_SAVE_DTYPE != "fp32":
+            raise ValueError("EXPORT_ONNX_INT8 quantizes from fp32 weights; keep MODEL_SAVE_DTYPE=fp32")
+        export_onnx_int8()
 
 if __name__ == "__main__":
-    bake_model()
\ No newline at end of file
+    bake_model()
@@ -16,6 +16,9 @@ if str(project_root) not in sys.path:
 from utils.logger import setup_logger
 from utils.paths import get_processed_data_path, get_final_data_path, get_log_path, PARAMS_PATH
 
+# Rows read, predicted and written per step: peak RSS tracks the chunk, not the monthly CSV
+LABEL_CHUNK_SIZE = int(os.getenv("LABEL_CHUNK_SIZE", 50_000))
+
 def load_params():
     """Load the single source of truth for the current batch ID."""
     if not PARAMS_PATH.exists():
@@ -24,6 +27,24 @@ def load_params():
     with open(PARAMS_PATH, "r") as f:
         return yaml.safe_load(f)
 
+def label_in_chunks(model, input_path, output_path, chunksize: int = LABEL_CHUNK_SIZE) -> int:
+    """
+    Streams input_path through model.predict chunk by chunk and writes output_path.
+    Cells are read as text (dtype=str) so every chunk passes through verbatim instead of
+    each one re-inferring int/float per column. Returns the number of rows labeled.
+    """
+    total = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as out:
+        for i, df in enumerate(pd.read_csv(input_path, chunksize=chunksize, dtype=str)):
+            if not df.empty:
+                # Note: Ensure this text handling exactly matches what the model was trained on!
+                X_input = df['title'].fillna('') + " " + df['description'].fillna('')
+                df['category'] = model.predict(X_input)
+            # Headers-only input yields one empty chunk -> headers-only output (DVC still gets its file)
+            df.to_csv(out, header=(i == 0), index=False)
+            total += len(df)
+    return total
+
 def run_labeling_pipeline():
     # 1. Load Configuration
     try:
@@ -70,30 +91,19 @@ def run_labeling_pipeline():
     logger.info(f"🔍 Processing data file: {input_path.name}")
     
     try:
-        # Pandas will read it as a CSV
-        df = pd.read_csv(input_path)
-
-        # Basic Validation
-        if 'title' not in df.columns:
+        # Basic Validation (header only, before anything is written)
+        if 'title' not in pd.read_csv(input_path, nrows=0).columns:
             logger.error(f"❌ 'title' column missing in {input_path.name}")
             return
-        
-        if df.empty:
-            logger.warning(f"⏩ {input_path.name} is empty. Creating empty output for DVC.")
-            # Create the headers-only CSV so DVC is happy
-            df.to_csv(output_path, index=False) 
+
+        # 6-8. Preprocess + inference + save, one chunk at a time
+        labeled = label_in_chunks(model, input_path, output_path)
+
+        if labeled == 0:
+            logger.warning(f"⏩ {input_path.name} is empty. Created empty output for DVC.")
             return
 
-        # 6. Preprocessing (Same logic as before)
-        # Note: Ensure this text handling exactly matches what the model was trained on!
-        X_input = (df['title'].fillna('') + " " + df['description'].fillna('')).astype(str)
-        
-        # 7. Inference
-        df['category'] = model.predict(X_input)
-        
-        # 8. Save to the specific DVC-tracked output path
-        df.to_csv(output_path, index=False)
-        logger.info(f"✅ Saved {len(df)} labeled rows to {output_path}")
+        logger.info(f"✅ Saved {labeled} labeled rows to {output_path}")
 
     except Exception as e:
         logger.error(f"❌ Could not process {input_path.name}: {str(e)}")
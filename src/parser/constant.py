@@ -1,19 +1,9 @@
-import nltk
-from utils.paths import NLTK_DATA_PATH
-
-# 1. Force NLTK to use local DVC Artifacts
-nltk.data.path.append(str(NLTK_DATA_PATH))
-
+import re
 import sys
+from functools import cache
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parent.parent.parent
-if str(ROOT) not in sys.path:
-    sys.path.append(str(ROOT))
-
 import nltk
-import sys
-from pathlib import Path
 
 # Reach Root logic
 ROOT = Path(__file__).resolve().parent.parent.parent
@@ -22,12 +12,14 @@ if str(ROOT) not in sys.path:
 
 from utils.paths import NLTK_DATA_PATH
 
-# 1. Force NLTK to use local path
-nltk.data.path.append(str(NLTK_DATA_PATH))
+# 1. Force NLTK to use local DVC Artifacts (once: every entry is probed on each lookup)
+if str(NLTK_DATA_PATH) not in nltk.data.path:
+    nltk.data.path.append(str(NLTK_DATA_PATH))
 
 # ---------------------------------------------------------
 # SELF-HEALING NLTK DOWNLOADER
 # ---------------------------------------------------------
+@cache
 def ensure_nltk_resources():
     """
     Checks for required NLTK resources and downloads them if missing.
@@ -54,10 +46,11 @@ def ensure_nltk_resources():
 ensure_nltk_resources()
 
 try:
-    STOPWORDS = set(nltk.corpus.stopwords.words("english"))
+    # Read-only vocabulary: frozen so no caller can mutate the shared set
+    STOPWORDS = frozenset(nltk.corpus.stopwords.words("english"))
 except LookupError:
     # Fallback if download failed (shouldn't happen with above logic)
-    STOPWORDS = set()
+    STOPWORDS = frozenset()
 
 # 2. Regex Patterns
 EMAIL_REGEX = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b"
@@ -88,6 +81,14 @@ MONTHS_LONG = r'''(january)|(february)|(march)|(april)|(may)|(june)|(july)|
 MONTH = r'(' + MONTHS_SHORT + r'|' + MONTHS_LONG + r')'
 YEAR = r'(((20|19)(\d{2})))'
 
+# Compiled once at import. EMAIL_RE backs utils.extract_email; the rest are exported for
+# callers that need them (nothing in the parser matches phones or dates yet).
+# MONTH spans lines with padding, hence VERBOSE (whitespace in the pattern is ignored).
+EMAIL_RE = re.compile(EMAIL_REGEX)
+PHONE_RE = re.compile(PHONE_REGEX)
+MONTH_RE = re.compile(MONTH, re.IGNORECASE | re.VERBOSE)
+YEAR_RE = re.compile(YEAR)
+
 
 
 RESUME_SECTIONS = [
@@ -22,8 +22,9 @@ class ResumeParserEngine:
     def _load_skills(self):
         if SKILLS_CSV_PATH.exists():
             df = pd.read_csv(SKILLS_CSV_PATH)
-            return [str(s).lower().strip() for s in df.columns.values]
-        return []
+            # frozenset: extract_skills probes it once per token / bigram / trigram
+            return frozenset(str(s).lower().strip() for s in df.columns.values)
+        return frozenset()
 
     def parse(self, raw_text: str) -> dict:
             sections = self.classify_sections(raw_text)
@@ -49,9 +49,7 @@ def manage_drift():
         updates_made = 0
 
         # 4. Evaluate Each Category
-        for _, row in df_dist.iterrows():
-            category = row['category']
-            pct = row['percentage']
+        for category, pct in zip(df_dist['category'].to_numpy(), df_dist['percentage'].to_numpy()):
             
             # --- DECISION LOGIC ---
             if pct < MIN_THRESHOLD_PCT:
@@ -73,56 +73,56 @@ def seed_database():
         conn.commit()
         print("✅ Schema created (if not existed).")
 
+        # Each table is loaded with ONE executemany: SQLAlchemy batches the rows into
+        # multi-row INSERT ... VALUES statements instead of a round trip per row.
+
         # --- 3. Populate Jobs (Taxonomy) ---
         jobs_clean = jobs_df[['job_title', 'internal_category']].drop_duplicates()
-        job_count = 0
-        for _, row in jobs_clean.iterrows():
-            insert_job = text("""
+        job_rows = [
+            {"title": title, "cat": cat}
+            for title, cat in zip(jobs_clean['job_title'].to_numpy(), jobs_clean['internal_category'].to_numpy())
+        ]
+        if job_rows:
+            conn.execute(text("""
                 INSERT INTO jobs_base (job_title, internal_category)
                 VALUES (:title, :cat)
                 ON CONFLICT (job_title) DO NOTHING;
-            """)
-            conn.execute(insert_job, {"title": row['job_title'], "cat": row['internal_category']})
-            job_count += 1
+            """), job_rows)
         
-        print(f"✅ Populated jobs_base with {job_count} roles.")
+        print(f"✅ Populated jobs_base with {len(job_rows)} roles.")
 
         # --- 4. Populate Locations ---
-        loc_count = 0
-        for loc in locations_list:
-            insert_loc = text("""
+        loc_rows = [{"loc": loc} for loc in locations_list]
+        if loc_rows:
+            conn.execute(text("""
                 INSERT INTO locations_base (location_name)
                 VALUES (:loc)
                 ON CONFLICT (location_name) DO NOTHING;
-            """)
-            conn.execute(insert_loc, {"loc": loc})
-            loc_count += 1
+            """), loc_rows)
         
-        print(f"✅ Populated locations_base with {loc_count} cities.")
+        print(f"✅ Populated locations_base with {len(loc_rows)} cities.")
 
         # --- 5. Populate Initial Policy ---
         policy_data = jobs_df[['internal_category', 'priority_tier']].drop_duplicates('internal_category')
-        policy_count = 0
-        
-        for _, row in policy_data.iterrows():
-            # Check if active policy exists
-            check_sql = text("""
-                SELECT 1 FROM ingestion_policy 
-                WHERE internal_category = :cat AND effective_to IS NULL
-            """)
-            result = conn.execute(check_sql, {"cat": row['internal_category']}).fetchone()
-            
-            if not result:
-                insert_policy = text("""
-                    INSERT INTO ingestion_policy (internal_category, priority, effective_from, reason)
-                    VALUES (:cat, :prio, :now, 'Initial Seed from CSV')
-                """)
-                conn.execute(insert_policy, {
-                    "cat": row['internal_category'], 
-                    "prio": row['priority_tier'],
-                    "now": datetime.now()
-                })
-                policy_count += 1
+
+        # Categories that already have an active policy, fetched once
+        active = {
+            row[0] for row in conn.execute(text("""
+                SELECT internal_category FROM ingestion_policy WHERE effective_to IS NULL
+            """))
+        }
+        now = datetime.now()
+        policy_rows = [
+            {"cat": cat, "prio": prio, "now": now}
+            for cat, prio in zip(policy_data['internal_category'].to_numpy(), policy_data['priority_tier'].to_numpy())
+            if cat not in active
+        ]
+        if policy_rows:
+            conn.execute(text("""
+                INSERT INTO ingestion_policy (internal_category, priority, effective_from, reason)
+                VALUES (:cat, :prio, :now, 'Initial Seed from CSV')
+            """), policy_rows)
+        policy_count = len(policy_rows)
         
         conn.commit()
         print(f"✅ Seeded {policy_count} ingestion policies.")
@@ -1,8 +1,14 @@
 import os
 import psycopg2
+import psycopg2.errors
 import sys
+import threading
 import time  
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
+from psycopg2.pool import ThreadedConnectionPool
+from pgvector.psycopg2 import register_vector
 from dotenv import load_dotenv
 
 # 1. Path Management
@@ -22,45 +28,177 @@ class PostgresClient:
         self.password = os.getenv("DB_PASSWORD", "postgres123")
         self.conn = None
 
-    def connect(self):
+        # Pool (per worker process). Built lazily on first connection() call.
+        # Sessions are long-lived and hold PREPAREd statements, so if a PgBouncer sits
+        # in front it must run in session mode (transaction mode drops them).
+        self.pool_min = int(os.getenv("DB_POOL_MIN", 4))
+        self.pool_max = int(os.getenv("DB_POOL_MAX", 16))
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool raises when exhausted; this makes borrowers wait instead
+        self._pool_slots = threading.BoundedSemaphore(self.pool_max)
+        # HNSW recall/speed knob, applied once per pooled session (pgvector default is 40).
+        # A scan returns at most ef_search rows, so callers raise it to their widest LIMIT.
+        self.hnsw_ef_search = int(os.getenv("HNSW_EF_SEARCH", 100))
+        self.hnsw_iterative_scan = os.getenv("HNSW_ITERATIVE_SCAN", "strict_order")
+        # pooled connection set up for vector queries -> names of the server-side prepared
+        # statements it already holds. Keyed by the object itself (not id(), which a new
+        # connection can reuse once the pool closes an old one); entries die with it.
+        self._prepared = weakref.WeakKeyDictionary()
+        # name -> PREPARE statement; see register_statement()
+        self._statements = {}
+
+    def _connect_kwargs(self) -> dict:
+        return dict(
+            host=self.host,
+            database=self.db_name,
+            user=self.user,
+            password=self.password,
+            sslmode=os.getenv("DB_SSL_MODE", "prefer")
+        )
+
+    def _with_retry(self, factory):
         """
-        Connects to the database with a retry mechanism to handle 
+        Runs `factory` with a retry mechanism to handle 
         Docker startup delays (The 'Race Condition').
         """
-        if self.conn is None or self.conn.closed:
-            # We try 5 times, waiting 2 seconds between each try.
-            # Total wait time = 10 seconds.
-            max_retries = 5
-            retry_delay = 2 
+        # We try 5 times, waiting 2 seconds between each try.
+        # Total wait time = 10 seconds.
+        max_retries = 5
+        retry_delay = 2 
+        
+        for attempt in range(max_retries):
+            try:
+                # If this returns, connection was successful
+                return factory()
             
-            for attempt in range(max_retries):
-                try:
-                    self.conn = psycopg2.connect(
-                        host=self.host,
-                        database=self.db_name,
-                        user=self.user,
-                        password=self.password,
-                        sslmode=os.getenv("DB_SSL_MODE", "prefer")
-                    )
-                    self.conn.autocommit = True
-                    # If we get here, connection was successful
-                    return self.conn
-                
-                except psycopg2.OperationalError as e:
-                    # OperationalError usually means "Can't connect to server"
-                    if attempt < max_retries - 1:
-                        print(f"⏳ Database not ready yet... retrying in {retry_delay}s ({attempt+1}/{max_retries})")
-                        time.sleep(retry_delay)
-                    else:
-                        # If it's the last attempt, crash loudly
-                        print("❌ Database connection failed after multiple retries.")
-                        raise ConnectionError(f"Failed to connect to DB after {max_retries} attempts: {e}")
-                        
+            except psycopg2.OperationalError as e:
+                # OperationalError usually means "Can't connect to server"
+                if attempt < max_retries - 1:
+                    print(f"⏳ Database not ready yet... retrying in {retry_delay}s ({attempt+1}/{max_retries})")
+                    time.sleep(retry_delay)
+                else:
+                    # If it's the last attempt, crash loudly
+                    print("❌ Database connection failed after multiple retries.")
+                    raise ConnectionError(f"Failed to connect to DB after {max_retries} attempts: {e}")
+
+    def connect(self):
+        """
+        Single dedicated connection (batch scripts / ingestion).
+        Request-path code should use connection() instead.
+        """
+        if self.conn is None or self.conn.closed:
+            self.conn = self._with_retry(lambda: psycopg2.connect(**self._connect_kwargs()))
+            self.conn.autocommit = True
         return self.conn
+
+    def _get_pool(self, retry: bool = True) -> ThreadedConnectionPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    build = lambda: ThreadedConnectionPool(self.pool_min, self.pool_max, **self._connect_kwargs())
+                    self._pool = self._with_retry(build) if retry else build()
+        return self._pool
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a pooled connection and hands it back on exit.
+        Saves the TCP + TLS + auth handshake that connect()/close() pays per call.
+        """
+        pool = self._get_pool()
+        with self._pool_slots:
+            conn = pool.getconn()
+            if conn.closed:
+                # Server dropped it while idle -> swap for a fresh one
+                self._prepared.pop(conn, None)
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+            conn.autocommit = True
+            try:
+                self._prepare(conn)
+                yield conn
+            finally:
+                if conn.closed:
+                    self._prepared.pop(conn, None)
+                pool.putconn(conn, close=bool(conn.closed))
+
+    def warm(self):
+        """
+        Opens and prepares DB_POOL_MIN connections up front (call at startup),
+        so the first requests don't pay handshake + register_vector.
+        Single attempt: if the DB isn't up yet there is nothing to warm.
+        """
+        pool = self._get_pool(retry=False)
+        conns = [pool.getconn() for _ in range(self.pool_min)]
+        try:
+            for conn in conns:
+                conn.autocommit = True
+                self._prepare(conn)
+        finally:
+            for conn in conns:
+                pool.putconn(conn, close=bool(conn.closed))
+
+    def require_ef_search(self, min_ef_search: int):
+        """
+        Raises the session hnsw.ef_search to at least `min_ef_search` (a caller's widest
+        HNSW LIMIT). Call before connections are handed out: it applies to new sessions.
+        """
+        self.hnsw_ef_search = max(self.hnsw_ef_search, min_ef_search)
+
+    def register_statement(self, name: str, arg_types: str, body: str):
+        """
+        Hot-path query parsed ONCE per pooled connection instead of per call.
+        `body` uses $1..$n placeholders; run it with `EXECUTE name(%s, ...)`.
+        """
+        self._statements[name] = f"PREPARE {name}({arg_types}) AS {body}"
+
+    def _prepare(self, conn):
+        """
+        One-time per physical connection: numpy arrays adapt straight to `vector`
+        (no Python list -> str round-trip per query) and HNSW search width is set.
+        Statements registered since the last checkout are PREPAREd here too; one the
+        server rejects is logged and unregistered instead of failing every checkout.
+        """
+        done = self._prepared.get(conn)
+        if done is None:
+            register_vector(conn)
+            with conn.cursor() as cur:
+                cur.execute("SET hnsw.ef_search = %s", (self.hnsw_ef_search,))
+                # pgvector >= 0.8: keep walking the HNSW graph until LIMIT rows survive the
+                # ILIKE filter (instead of returning < LIMIT after post-filtering ef_search rows)
+                try:
+                    cur.execute("SET hnsw.iterative_scan = %s", (self.hnsw_iterative_scan,))
+                except psycopg2.Error:
+                    pass  # older pgvector: setting unknown, plain HNSW scan
+            done = self._prepared[conn] = set()
+
+        if done.issuperset(self._statements):
+            return
+        with conn.cursor() as cur:
+            for name, statement in list(self._statements.items()):
+                if name in done:
+                    continue
+                try:
+                    cur.execute(statement)
+                except psycopg2.errors.DuplicatePreparedStatement:
+                    pass  # already on this session
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    raise  # connection-level failure, not the statement's fault
+                except psycopg2.Error as e:
+                    # Bad SQL fails on every session: drop it so only its EXECUTE callers fail
+                    print(f"❌ PREPARE {name} rejected, statement unregistered: {e}")
+                    self._statements.pop(name, None)
+                    continue
+                done.add(name)
     
     def close(self):
         if self.conn and not self.conn.closed:
             self.conn.close()
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+            self._prepared.clear()
 
     def get_cursor(self):
         return self.connect().cursor()
\ No newline at end of file
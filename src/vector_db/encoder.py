@@ -1,10 +1,14 @@
 import logging
-import torch
+import queue
+import threading
+import time
 import sys
 import os
+from concurrent.futures import Future
 from pathlib import Path
 from typing import List
-from sentence_transformers import SentenceTransformer
+
+import numpy as np
 
 # 1. Path Management: Add Project Root to Path
 # This is still needed for direct execution, but now we use utils.paths for logic
@@ -15,13 +19,26 @@ if str(ROOT_DIR) not in sys.path:
 # Import your helper
 from utils.paths import get_model_path
 
+# Dynamic int8 ONNX graph written next to the torch weights by scripts/download_model_OT.py
+# (sentence-transformers' export_dynamic_quantized_onnx_model naming)
+ONNX_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
 class SemanticEncoder:
-    def __init__(self, model_name: str = "all-mpnet-base-v2"):
+    def __init__(self, model_name: str = "all-mpnet-base-v2", precision: str = "fp32"):
         """
         Initializes the encoder. 
         Prioritizes loading from the local 'models/' directory (DVC tracked) via utils.paths.
+
+        precision: "fp32" | "bf16" | "fp16" | "int8" | "onnx-int8" | "auto".
+        Reduced precision halves weight bandwidth on the transformer matmuls;
+        "onnx-int8" runs the pre-quantized ONNX graph on ONNX Runtime (CPU int8 GEMM).
+        Output vectors are always float32 so the Postgres schema is unchanged.
         """
         self.logger = logging.getLogger("mlops_pipeline")
+
+        # Heavy imports (~5s) deferred to construction so importing the API module stays cheap
+        import torch
+        from sentence_transformers import SentenceTransformer
         
         # Determine compute backend
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -58,9 +75,17 @@ class SemanticEncoder:
                     f"Downloading from Hugging Face: {model_source}"
                 )
 
+        self.precision = self._resolve_precision(precision)
+
+        # ONNX Runtime backend instead of torch: pooling + normalization stay in SentenceTransformers
+        backend_kwargs = {}
+        if self.precision == "onnx-int8":
+            self.device = "cpu"
+            backend_kwargs = {"backend": "onnx", "model_kwargs": {"file_name": ONNX_INT8_FILE}}
+
         # Initialize model
         try:
-            self.model = SentenceTransformer(model_source, device=self.device)#download if model is not there and if its present locally use that 
+            self.model = SentenceTransformer(model_source, device=self.device, **backend_kwargs)#download if model is not there and if its present locally use that 
             print(f"🌟 Model loaded and ready for inference.")
 
             self.logger.info(f"✅ Model successfully loaded: {model_source}")
@@ -70,18 +95,57 @@ class SemanticEncoder:
             
             raise e
 
+        self._apply_precision()
+        self.logger.info(f"🎚️ Inference precision: {self.precision}")
+
+    def _resolve_precision(self, precision: str) -> str:
+        """'auto' picks the cheapest dtype the hardware runs natively."""
+        if precision != "auto":
+            return precision
+        if self.device == "cuda":
+            return "fp16"
+        import torch
+        # AVX512-BF16 / AMX CPUs have native bf16 matmul kernels
+        bf16_native = getattr(torch.cpu, "_is_avx512_bf16_supported", lambda: False)() or \
+                      getattr(torch.cpu, "_is_amx_tile_supported", lambda: False)()
+        return "bf16" if bf16_native else "fp32"
+
+    def _apply_precision(self):
+        import torch
+        if self.precision == "bf16":
+            self.model = self.model.to(torch.bfloat16)
+        elif self.precision == "fp16":
+            self.model = self.model.half()
+        elif self.precision == "int8":
+            # Dynamic int8 on the Linear layers (VNNI kernels on x86), CPU only
+            # (from fp32 weights: quantize_dynamic expects float32 Linears, see fp32 below)
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model.float(), {torch.nn.Linear}, dtype=torch.qint8
+            )
+        elif self.precision == "onnx-int8":
+            pass  # quantized at export time (download_model_OT.py)
+        elif self.precision == "fp32":
+            # transformers >= 5 loads in the artifact's saved dtype: an fp16-baked model
+            # (download_model_OT.py MODEL_SAVE_DTYPE) must be upcast; no-op for fp32 weights
+            self.model = self.model.float()
+        else:
+            raise ValueError(f"Unknown encoder precision: {self.precision}")
+
     def encode_batch(
         self,
         texts: List[str],
-        batch_size: int = 32
+        batch_size: int = 32,
+        as_numpy: bool = False
     ) -> List[List[float]]:
         """
         Generates normalized 768-dim embeddings for a list of strings.
         Normalization is CRITICAL for Cosine Similarity.
+        as_numpy=True returns a contiguous float32 (n, 768) array and skips the
+        Python-list round-trip (in-process scoring; ingestion still wants lists).
         """
         if not texts:
             self.logger.warning("⚠️ encode_batch received empty text list.")
-            return []
+            return np.empty((0, 0), dtype=np.float32) if as_numpy else []
 
         self.logger.info(f"🔢 Encoding {len(texts)} documents...")
 
@@ -93,7 +157,88 @@ class SemanticEncoder:
             normalize_embeddings=True  # Keep this consistent across the project
         )
 
+        if as_numpy:
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+
         # Ensure output is a Python list for JSON serialization (FastAPI/Postgres)
         if hasattr(embeddings, 'tolist'):
             return embeddings.tolist()
-        return embeddings
\ No newline at end of file
+        return embeddings
+
+class BatchedEncoder:
+    """
+    Dynamic batching in front of a SemanticEncoder.
+    Concurrent callers (FastAPI threadpool) each enqueue one text and block on a Future;
+    a single worker thread drains the queue every `max_wait` seconds (or as soon as
+    `max_batch` texts are pending) and runs ONE forward pass for the whole group.
+    A request that finds the queue otherwise empty is encoded right away (no peers to
+    wait for); after close() callers are encoded inline on their own thread.
+    """
+
+    def __init__(self, encoder: SemanticEncoder, max_batch: int = 16, max_wait: float = 0.02):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.Queue" = queue.Queue()
+        # Guards _closed + enqueue, so nothing lands behind the worker's exit sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def embed(self, text: str) -> np.ndarray:
+        """Blocks until the batch containing `text` has been encoded (float32 row)."""
+        future: Future = Future()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((text, future))
+        if closed:
+            # Worker is gone: nobody would ever resolve the future
+            return self.encoder.encode_batch([text], batch_size=1, as_numpy=True)[0]
+        return future.result()
+
+    def close(self):
+        # Sentinel: worker flushes whatever is pending and exits
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            # Lone request: no peers pending -> don't make it sit out max_wait
+            deadline = time.monotonic() + (self.max_wait if not self._queue.empty() else 0)
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            # SentenceTransformers sorts by length + pads per batch, so padding waste stays low
+            vectors = self.encoder.encode_batch(texts, batch_size=len(texts), as_numpy=True)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
@@ -25,6 +25,15 @@ CURR_MONTH = str(params['ingest']['current_month'])
 BATCH_SIZE = params['ml_models']['vector_encoding']['batch_size']
 INSERT_BATCH_SIZE = 100  # 🆕 Limit rows per insert query to prevent timeouts
 
+# Stage 2 filters on `category ILIKE '%term%' OR job_title ILIKE '%term%'`; leading
+# wildcards need trigram GIN indexes (see init_db.sql). Re-asserted on every load so
+# databases created before they existed in init_db.sql get them too.
+TRIGRAM_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE INDEX IF NOT EXISTS idx_job_category_trgm ON job_embeddings USING gin (category gin_trgm_ops);",
+    "CREATE INDEX IF NOT EXISTS idx_job_title_trgm ON job_embeddings USING gin (job_title gin_trgm_ops);",
+]
+
 logger = setup_logger(BASE_DIR / "logs" / "vector_db" / f"{CURR_MONTH}.log")
 
 def prepare_context_text(df: pd.DataFrame) -> list:
@@ -95,7 +104,8 @@ def main():
             db = PostgresClient() 
             
             data_tuples = []
-            for idx, (original_i, row) in enumerate(df_new.iterrows()):
+            # Hot loop: plain dicts, not iterrows() (a Series per row)
+            for idx, row in enumerate(df_new.to_dict("records")):
                 meta_payload = {
                     "company": row.get('company_name'),
                     "salary": row.get('salary'),
@@ -130,6 +140,12 @@ def main():
                     batch = data_tuples[i:i + INSERT_BATCH_SIZE]
                     execute_values(cur, insert_query, batch)
                     logger.info(f"   Saved batch {i//INSERT_BATCH_SIZE + 1}/{total_batches}")
+
+                logger.info("🛠️ Optimizing: Ensuring trigram indexes for Stage 2 filters exist...")
+                for ddl in TRIGRAM_INDEX_DDL:
+                    cur.execute(ddl)
+                # Fresh stats so the planner sees the new rows when picking trigram bitmap vs HNSW
+                cur.execute("ANALYZE job_embeddings;")
             
             logger.info(f"✅ Ingested {new_records_count} new records into Postgres.")
             (csv_path.parent / f"{CURR_MONTH}.vector_done").touch()
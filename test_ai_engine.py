@@ -1,5 +1,6 @@
 import os
 import sys
+import asyncio
 import time
 import json
 from pathlib import Path
@@ -49,13 +50,13 @@ def test_ai_insight_engine():
         print(f"   2. Generating Insight for category: '{category}'...")
         start = time.time()
         
-        result = engine.generate_insight(
+        result = asyncio.run(engine.generate_insight(
             resume_text=dummy_resume,
             user_skills=colab_anchors, # Passing the working anchors
             category=category,
             matched_jobs=matched_jobs,
             gap_jobs=gap_jobs
-        )
+        ))
         
         duration = time.time() - start
         
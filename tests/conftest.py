@@ -19,7 +19,7 @@ def mock_scorer():
         mock_instance = MagicMock()
         
         # Define what the fake service returns
-        mock_instance.get_recommendations.return_value = {
+        mock_result = {
             "status": "success",
             "results": [
                 {
@@ -30,6 +30,8 @@ def mock_scorer():
                 }
             ]
         }
+        mock_instance.get_recommendations.return_value = mock_result
+        mock_instance.get_recommendations_cached.return_value = mock_result
         
         # When main.py calls ResumeScorerService(), return our fake
         MockService.return_value = mock_instance
@@ -9,10 +9,10 @@ from app.api.main import app
 # Initialize Client
 # Note: We use the context manager to ensure startup/shutdown events run
 @pytest.fixture
-def client(mock_scorer):
+def client(mock_scorer, mock_ingestor):
     """
     Returns a TestClient where the 'lifespan' startup event 
-    loads our MOCKED scorer instead of the real one.
+    loads our MOCKED scorer and ingestor factory instead of the real ones.
     """
     with TestClient(app) as c:
         yield c
@@ -67,6 +67,46 @@ class TestResumeAPI:
         response = client.post("/api/v1/score_file") # No files argument
         assert response.status_code == 422
 
+    def test_score_resume_rejects_oversize_file(self, client, mock_ingestor):
+        """
+        GIVEN a file bigger than MAX_FILE_SIZE
+        WHEN /api/v1/score_file is called
+        THEN it should return 413 before the ingestor ever sees the bytes.
+        """
+        from app.api.main import MAX_FILE_SIZE
+
+        files = {"file": ("huge.pdf", b"0" * (MAX_FILE_SIZE + 1), "application/pdf")}
+        response = client.post("/api/v1/score_file", files=files)
+
+        assert response.status_code == 413
+        mock_ingestor.extract.assert_not_called()
+
+    def test_score_batch_isolates_bad_files(self, client, mock_scorer):
+        """
+        GIVEN a batch with one parseable and one unsupported file
+        WHEN /api/v1/score_batch is called
+        THEN the good file is scored and the bad one reports its own error.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest.mock import patch
+
+        mock_scorer.get_recommendations_batch.return_value = [{"status": "success", "results": []}]
+        files = [
+            ("files", ("a.txt", b"Python developer", "text/plain")),
+            ("files", ("b.xyz", b"???", "application/octet-stream")),
+        ]
+
+        # Threads instead of processes: same interface, no fork inside pytest
+        with patch.object(client.app.state, "parse_pool", ThreadPoolExecutor(max_workers=2)):
+            response = client.post("/api/v1/score_batch", files=files)
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0] == {"filename": "a.txt", "status": "success", "results": []}
+        assert results[1]["error"] == "Parsing error"
+        keys, texts = mock_scorer.get_recommendations_batch.call_args[0]
+        assert texts == ["Python developer"]
+
     def test_parse_only_endpoint(self, client, mock_ingestor):
         """
         GIVEN a file
@@ -77,13 +117,41 @@ class TestResumeAPI:
         
         # We need to mock the Parser Engine specifically for this endpoint too
         # or it will try to run the real Regex logic (which is fine, but mocking is safer)
+        # The parser is a lifespan singleton, so swap the instance on app.state
         from unittest.mock import patch
-        with patch("app.api.main.ResumeParserEngine") as MockParser:
-            MockParser.return_value.parse.return_value = {"name": "Test User", "skills": ["Python"]}
+        with patch.object(client.app.state, "parser") as MockParser:
+            MockParser.parse.return_value = {"name": "Test User", "skills": ["Python"]}
             
             response = client.post("/api/v1/parse_resume", files=files)
             
             assert response.status_code == 200
             data = response.json()
             assert data["name"] == "Test User"
-            assert "raw_text" in data
\ No newline at end of file
+            assert "raw_text" in data
+
+    def test_inventory_endpoint_lists_names_not_metrics(self, client):
+        """
+        GIVEN the DB metrics updater has run
+        WHEN /api/v1/inventory and /metrics are called
+        THEN role/location names appear in the JSON inventory, and /metrics only carries counts.
+        """
+        from unittest.mock import MagicMock
+        from app.api.main import update_db_metrics, _metrics_cache
+
+        db = MagicMock()
+        cur = db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        cur.fetchall.return_value = [
+            ("role", "Data Scientist", None, None, None, None),
+            ("role", "DevOps Engineer", None, None, None, None),
+            ("location", "Pune", None, None, None, None),
+        ]
+        update_db_metrics(db)
+
+        inv = client.get("/api/v1/inventory").json()
+        assert inv["roles"] == ["Data Scientist", "DevOps Engineer"]
+        assert inv["locations"] == ["Pune"]
+
+        _metrics_cache["ts"] = 0.0  # bypass the scrape TTL cache
+        body = client.get("/metrics").text
+        assert "db_role_count 2.0" in body
+        assert "Data Scientist" not in body
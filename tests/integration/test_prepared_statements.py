@@ -0,0 +1,48 @@
+"""
+PREPAREs every hot-path statement against a REAL Postgres + pgvector (>= 0.7, halfvec).
+The scorer tests mock the cursor, so SQL the server rejects only shows up here.
+Skipped when no database is reachable (DB_HOST / DB_USER / DB_PASSWORD / DB_NAME),
+unless DB_REQUIRED=1 (CI), where an unreachable database fails the run instead.
+"""
+
+import os
+import pytest
+import psycopg2
+import sys
+from pathlib import Path
+
+# --- SETUP PATHS ---
+root_dir = Path(__file__).resolve().parent.parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.append(str(root_dir))
+
+from src.vector_db.client import PostgresClient
+from app.services.score_resume import PREPARED_STATEMENTS
+
+INIT_SQL = root_dir / "init_db.sql"
+
+
+@pytest.fixture
+def live_conn():
+    try:
+        conn = psycopg2.connect(**PostgresClient()._connect_kwargs(), connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        if os.getenv("DB_REQUIRED") == "1":
+            pytest.fail(f"DB_REQUIRED=1 but no Postgres reachable: {e}")
+        pytest.skip(f"No Postgres reachable: {e}")
+
+    # Schema + PREPAREs run in one transaction that is rolled back: nothing persists
+    try:
+        with conn.cursor() as cur:
+            cur.execute(INIT_SQL.read_text())
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.mark.parametrize("name", sorted(PREPARED_STATEMENTS))
+def test_statement_prepares(live_conn, name):
+    arg_types, body = PREPARED_STATEMENTS[name]
+    with live_conn.cursor() as cur:
+        cur.execute(f"PREPARE {name}({arg_types}) AS {body}")
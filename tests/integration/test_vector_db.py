@@ -10,6 +10,7 @@ if str(root_dir) not in sys.path:
     sys.path.append(str(root_dir))
 
 from src.vector_db.client import PostgresClient
+from src.vector_db.encoder import BatchedEncoder
 
 class TestPostgresClient:
     """
@@ -81,4 +82,248 @@ class TestPostgresClient:
 
         # 3. Assert
         assert cursor == mock_cursor
-        mock_conn.cursor.assert_called_once()
\ No newline at end of file
+        mock_conn.cursor.assert_called_once()
+
+    @patch("src.vector_db.client.register_vector")
+    @patch("src.vector_db.client.ThreadedConnectionPool")
+    def test_connection_reuses_pool(self, mock_pool_cls, mock_register):
+        """
+        Scenario: Several requests borrow a connection one after another.
+        Expectation: Pool is built once, every connection is handed back,
+        and pgvector setup runs once per physical connection.
+        """
+        mock_pool = mock_pool_cls.return_value
+        mock_pool.getconn.return_value.closed = 0
+
+        client = PostgresClient()
+        for _ in range(3):
+            with client.connection() as conn:
+                assert conn is mock_pool.getconn.return_value
+
+        mock_pool_cls.assert_called_once()
+        assert mock_pool.putconn.call_count == 3
+        mock_register.assert_called_once_with(mock_pool.getconn.return_value)
+
+        client.close()
+        mock_pool.closeall.assert_called_once()
+
+    @patch("src.vector_db.client.register_vector")
+    @patch("src.vector_db.client.ThreadedConnectionPool")
+    def test_warm_prepares_min_connections(self, mock_pool_cls, mock_register):
+        """
+        Scenario: API startup warms the pool.
+        Expectation: DB_POOL_MIN distinct connections are prepared and handed back.
+        """
+        mock_pool = mock_pool_cls.return_value
+        conns = [MagicMock(closed=0) for _ in range(2)]
+        mock_pool.getconn.side_effect = conns
+
+        client = PostgresClient()
+        client.pool_min = 2
+        client.warm()
+
+        assert mock_register.call_count == 2
+        assert mock_pool.putconn.call_count == 2
+
+    @patch("src.vector_db.client.register_vector")
+    @patch("src.vector_db.client.ThreadedConnectionPool")
+    def test_registered_statements_prepared_once_per_connection(self, mock_pool_cls, mock_register):
+        """
+        Scenario: Scorer registers its hot-path queries; requests reuse one connection.
+        Expectation: each PREPARE is sent once per connection, including statements
+        registered after the connection was first set up.
+        """
+        mock_pool = mock_pool_cls.return_value
+        conn = mock_pool.getconn.return_value
+        conn.closed = 0
+        cur = conn.cursor.return_value.__enter__.return_value
+
+        client = PostgresClient()
+        client.register_statement("top_roles", "vector, int", "SELECT 1 LIMIT $2")
+        for _ in range(3):
+            with client.connection():
+                pass
+        client.register_statement("misses", "text", "SELECT $1")
+        with client.connection():
+            pass
+
+        prepares = [c.args[0] for c in cur.execute.call_args_list if c.args[0].startswith("PREPARE")]
+        assert prepares == [
+            "PREPARE top_roles(vector, int) AS SELECT 1 LIMIT $2",
+            "PREPARE misses(text) AS SELECT $1",
+        ]
+
+    @patch("src.vector_db.client.register_vector")
+    @patch("src.vector_db.client.ThreadedConnectionPool")
+    def test_rejected_statement_is_dropped_not_fatal(self, mock_pool_cls, mock_register):
+        """
+        Scenario: the server rejects one registered statement (bad SQL).
+        Expectation: checkouts keep working, the other statements are prepared,
+        and the rejected one is unregistered instead of retried on every checkout.
+        """
+        conn = mock_pool_cls.return_value.getconn.return_value
+        conn.closed = 0
+        cur = conn.cursor.return_value.__enter__.return_value
+
+        def execute(sql, *args):
+            if sql.startswith("PREPARE broken"):
+                raise psycopg2.errors.SyntaxError("invalid UNION/INTERSECT/EXCEPT ORDER BY clause")
+        cur.execute.side_effect = execute
+
+        client = PostgresClient()
+        client.register_statement("broken", "int", "SELECT $1 UNION SELECT 2 ORDER BY $1 + 1")
+        client.register_statement("top_roles", "vector, int", "SELECT 1 LIMIT $2")
+        for _ in range(2):
+            with client.connection():
+                pass
+
+        prepares = [c.args[0] for c in cur.execute.call_args_list if c.args[0].startswith("PREPARE")]
+        assert prepares == [
+            "PREPARE broken(int) AS SELECT $1 UNION SELECT 2 ORDER BY $1 + 1",
+            "PREPARE top_roles(vector, int) AS SELECT 1 LIMIT $2",
+        ]
+        assert list(client._statements) == ["top_roles"]
+
+    @patch("src.vector_db.client.register_vector")
+    @patch("src.vector_db.client.ThreadedConnectionPool")
+    def test_ef_search_floor_applied_to_sessions(self, mock_pool_cls, mock_register):
+        """
+        Scenario: the scorer re-ranks more HNSW candidates than ef_search allows.
+        Expectation: require_ef_search only ever raises the value, and new sessions get it.
+        """
+        conn = mock_pool_cls.return_value.getconn.return_value
+        conn.closed = 0
+        cur = conn.cursor.return_value.__enter__.return_value
+
+        client = PostgresClient()
+        client.hnsw_ef_search = 40
+        client.require_ef_search(50)
+        client.require_ef_search(10)
+        with client.connection():
+            pass
+
+        cur.execute.assert_any_call("SET hnsw.ef_search = %s", (50,))
+
+
+class TestBatchedEncoder:
+    """
+    Tests the micro-batching layer that sits in front of the transformer.
+    """
+
+    def test_concurrent_calls_share_one_forward_pass(self):
+        """
+        Scenario: 4 requests queue up while the worker is busy with an earlier one.
+        Expectation: they run as ONE forward pass, every caller gets its own row back.
+        """
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        busy, release = threading.Event(), threading.Event()
+        def encode(texts, batch_size, **kw):
+            if texts == ["warm"]:
+                busy.set()
+                release.wait(5)
+            return [[float(len(t))] for t in texts]
+        mock_encoder = MagicMock()
+        mock_encoder.encode_batch.side_effect = encode
+
+        batcher = BatchedEncoder(mock_encoder, max_batch=4, max_wait=1.0)
+        texts = ["a", "bb", "ccc", "dddd"]
+        with ThreadPoolExecutor(max_workers=5) as ex:
+            warm = ex.submit(batcher.embed, "warm")
+            assert busy.wait(5)
+            futures = [ex.submit(batcher.embed, t) for t in texts]
+            deadline = time.monotonic() + 5
+            while batcher._queue.qsize() < len(texts) and time.monotonic() < deadline:
+                time.sleep(0.005)
+            release.set()
+            results = [f.result() for f in futures]
+            warm.result()
+        batcher.close()
+
+        assert results == [[1.0], [2.0], [3.0], [4.0]]
+        assert mock_encoder.encode_batch.call_count == 2
+        assert mock_encoder.encode_batch.call_args.args[0] == texts
+
+    def test_lone_request_skips_batching_window(self):
+        """Nothing else queued -> encoded right away, not after max_wait."""
+        import time
+
+        mock_encoder = MagicMock()
+        mock_encoder.encode_batch.side_effect = lambda texts, batch_size, **kw: [[1.0] for _ in texts]
+
+        batcher = BatchedEncoder(mock_encoder, max_batch=16, max_wait=5.0)
+        start = time.monotonic()
+        assert batcher.embed("resume") == [1.0]
+        assert time.monotonic() - start < 1.0
+        batcher.close()
+
+    def test_embed_after_close_encodes_inline(self):
+        """The worker has exited: embed must not block on a queue nobody drains."""
+        mock_encoder = MagicMock()
+        mock_encoder.encode_batch.side_effect = lambda texts, batch_size, **kw: [[2.0] for _ in texts]
+
+        batcher = BatchedEncoder(mock_encoder, max_batch=4, max_wait=0.0)
+        batcher.close()
+        batcher._worker.join(timeout=5)
+        assert batcher.embed("late") == [2.0]
+        batcher.close()  # idempotent
+
+    def test_encoder_failure_propagates_to_caller(self):
+        mock_encoder = MagicMock()
+        mock_encoder.encode_batch.side_effect = RuntimeError("CUDA OOM")
+
+        batcher = BatchedEncoder(mock_encoder, max_batch=1, max_wait=0.0)
+        with pytest.raises(RuntimeError):
+            batcher.embed("resume")
+        batcher.close()
+
+
+class TestRoleIngestor:
+    """
+    Tests the anchor-role seeding script against mocked encoder / DB.
+    """
+
+    @pytest.fixture
+    def role_files(self, tmp_path):
+        import json
+        csv_path = tmp_path / "jobs.csv"
+        csv_path.write_text(
+            "job_title,internal_category,priority_tier\n"
+            "Data Scientist,ML,1\nML Engineer,ML,1\nGhost Role,ML,3\n"
+        )
+        kb_path = tmp_path / "kb.json"
+        kb_path.write_text(json.dumps([
+            {"job_title": "Data Scientist", "role_summary": "Models", "resume_keywords": [" PyTorch "]},
+            {"job_title": "ML Engineer", "role_summary": "Serving", "resume_keywords": ["Docker"]},
+        ]))
+        return csv_path, kb_path
+
+    @patch("data_ingestion.roles_ingestion.ingest_job_categories.execute_values")
+    @patch("data_ingestion.roles_ingestion.ingest_job_categories.PostgresClient")
+    @patch("data_ingestion.roles_ingestion.ingest_job_categories.SemanticEncoder")
+    def test_all_roles_encoded_and_upserted_in_one_call(self, mock_encoder_cls, mock_client_cls, mock_execute_values, role_files):
+        """
+        Scenario: 3 CSV rows, 2 with KB details.
+        Expectation: one encode_batch call for both anchors and one multi-VALUES
+        upsert, each row carrying its own vector.
+        """
+        from data_ingestion.roles_ingestion import ingest_job_categories as mod
+
+        csv_path, kb_path = role_files
+        mock_encoder_cls.return_value.encode_batch.side_effect = lambda texts, **kw: [[float(i)] for i in range(len(texts))]
+
+        with patch.object(mod, "JOBS_CSV_PATH", csv_path), patch.object(mod, "KB_JSON_PATH", kb_path):
+            mod.RoleIngestor().ingest_roles()
+
+        assert mock_encoder_cls.return_value.encode_batch.call_count == 1
+        texts = mock_encoder_cls.return_value.encode_batch.call_args.args[0]
+        assert len(texts) == 2 and texts[0].startswith("Role: Data Scientist")
+
+        assert mock_execute_values.call_count == 1
+        upserts = mock_execute_values.call_args.args[2]
+        assert [(u[0], u[3], u[5]) for u in upserts] == [
+            ("Data Scientist", [0.0], ["pytorch"]),
+            ("ML Engineer", [1.0], ["docker"]),
+        ]
@@ -14,7 +14,7 @@ if str(root_dir) not in sys.path:
     sys.path.append(str(root_dir))
 
 # Import the class and the weights to verify math
-from app.services.score_resume import ResumeScorerService, W_SEMANTIC, W_KEYWORDS, W_MUST_HAVE
+from app.services.score_resume import ResumeScorerService, get_encoder, W_SEMANTIC, W_KEYWORDS, W_MUST_HAVE, _JobMatrix, _RoleMatrix, _KeywordIndex
 
 class TestScoringLogic:
     """
@@ -31,11 +31,12 @@ class TestScoringLogic:
         with patch("app.services.score_resume.PostgresClient") as MockDB, \
              patch("app.services.score_resume.SemanticEncoder") as MockEncoder:
             
+            get_encoder.cache_clear()  # process-wide singleton: rebuild it from the mocked class
             service = ResumeScorerService()
             
             # 1. Setup Mock DB
             service.db = MockDB.return_value
-            service.db.connect.return_value.cursor.return_value.__enter__.return_value = MagicMock()
+            service.db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = MagicMock()
             
             # 2. Setup Mock Encoder (Return dummy vector [1.0, 0.0])
             # This ensures dot product math is predictable
@@ -71,20 +72,16 @@ class TestScoringLogic:
         dummy_vector = [1.0, 0.0]  # Matches the encoder mock above
         
         # 2. Mock the DB to return a specific 'Role Definition'
-        # Format: (category_title, full_definition, semantic_score)
+        # Format: (category_title, resume_keywords, must_haves, semantic_score)
         mock_row = (
             "Python Developer",
-            {
-                "resume_keywords": ["Python"],         # 100% Keyword Match (1.0)
-                "skill_taxonomy": {
-                    "must_have": ["Python"]            # 100% 'Must Have' Match
-                }
-            },
+            ["Python"],         # 100% Keyword Match (1.0)
+            ["Python"],         # 100% 'Must Have' Match
             0.9 # Simulating a 90% Semantic Match from the Vector DB
         )
         
         # Inject the mock row into the cursor
-        mock_cursor = scorer_service.db.connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor = scorer_service.db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
         mock_cursor.fetchall.return_value = [mock_row]
 
         # 3. Action: Run the logic
@@ -111,11 +108,11 @@ class TestScoringLogic:
         # But "Perfect" Keyword Match.
         mock_row = (
             "Legacy Coder",
-            {"resume_keywords": ["Cobol"], "skill_taxonomy": {}}, 
+            ["Cobol"], [],
             0.1 # Very low semantic score
         )
         
-        mock_cursor = scorer_service.db.connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor = scorer_service.db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
         mock_cursor.fetchall.return_value = [mock_row]
         
         # Resume has the keyword
@@ -129,4 +126,263 @@ class TestScoringLogic:
         
         # This asserts that relying ONLY on keywords isn't enough to pass a high bar (0.5).
         # This confirms your system prefers Semantic matches.
-        assert results[0]["score"] < 0.5, "System gave a high score to a semantic mismatch!"
\ No newline at end of file
+        assert results[0]["score"] < 0.5, "System gave a high score to a semantic mismatch!"
+
+    def test_keyword_automaton_matches_substring_overlap(self, scorer_service):
+        """
+        The shared Aho-Corasick index must score every role exactly like
+        _calculate_overlap, including overlapping terms, duplicates, padded
+        keywords and terms listed by several roles.
+        """
+        resume = "Senior Python developer; PySpark, SQL and Docker-Compose."
+        cases = [
+            ["Python", "Java", "Docker", "Rust"],
+            ["spark", "PySpark", " sql ", "SQL"],
+            ["docker-compose", "compose", "k8s"],
+            [],
+        ]
+        expected = [scorer_service._calculate_overlap(resume, terms) for terms in cases]
+        assert list(_KeywordIndex(cases).scores(resume.lower())) == expected
+
+    def test_in_memory_stage1_matches_sql_formula(self, scorer_service):
+        """
+        The RAM role matrix must rank by cosine and feed the same weighted formula,
+        without touching Postgres.
+        """
+        scorer_service.db.connection.reset_mock()
+        scorer_service._role_matrix = _RoleMatrix([
+            ("Python Developer", ["Python"], ["Python"], [1.0, 0.0]),
+            ("Chef", ["Cooking"], [], [0.0, 1.0]),
+        ], scorer_service.encoder)
+
+        scorer_service.encoder.encode_batch.reset_mock()
+        results = scorer_service._get_category_matches("I have Python skill.", [1.0, 0.0])
+
+        assert [r["category"] for r in results] == ["Python Developer", "Chef"]
+        scorer_service.encoder.encode_batch.assert_not_called()  # must-haves embedded at load time
+        expected = (1.0 * W_SEMANTIC) + (1.0 * W_KEYWORDS) + (1.0 * W_MUST_HAVE)
+        assert results[0]["score"] == pytest.approx(expected, 0.001)
+        scorer_service.db.connection.assert_not_called()
+
+    def test_pgvector_stage1_must_haves_encoded_once(self, scorer_service):
+        """
+        Without the role matrix, all candidates' must-haves go through ONE encode_batch
+        call, and later requests reuse the cached vectors.
+        """
+        rows = [
+            ("Python Developer", [], ["Python"], 0.9),
+            ("Data Engineer", [], ["SQL", "Spark"], 0.8),
+            ("Chef", [], [], 0.1),
+        ]
+        scorer_service.encoder.encode_batch.reset_mock()
+        scorer_service.encoder.encode_batch.return_value = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+        first = scorer_service._role_rows(rows, [1.0, 0.0], "")
+        second = scorer_service._role_rows(rows, [1.0, 0.0], "")
+
+        scorer_service.encoder.encode_batch.assert_called_once()
+        assert scorer_service.encoder.encode_batch.call_args[0][0] == ["Python", "SQL Spark"]
+        titles, features = first
+        assert titles == ["Python Developer", "Data Engineer", "Chef"]
+        assert list(features[:, 2]) == [1.0, 0.0, 0.0]  # must-have column
+        assert np.array_equal(features, second[1])
+
+    def test_fused_stage12_single_round_trip(self, scorer_service):
+        """
+        With no RAM matrices, roles + their jobs come back from ONE query (already
+        deduplicated by DISTINCT ON) and are split / ranked / filtered in Python.
+        Roles outside the LATERAL-joined lead set carry no jobs (with_jobs = FALSE).
+        """
+        meta = ("Acme", None, None, None, None)  # company, link, salary, source, posted_at
+        no_job = (None, None, None, *(None,) * 5, None)
+        mock_cursor = scorer_service.db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [
+            # (role, keywords, must_haves, sem, with_jobs, job_id, job_title, location, *meta, conf)
+            ("Python Developer", ["Python"], [], 0.9, True, "j1", "Python Dev", "Pune", *meta, 0.95),
+            ("Python Developer", ["Python"], [], 0.9, True, "j3", "Py Intern", "Goa", *meta, 0.30),    # below floor
+            ("Chef", ["Cooking"], [], 0.1, True, *no_job),                                          # no postings
+            ("Data Engineer", ["Python"], [], 0.05, False, *no_job),                                # Stage 1 only
+        ]
+        scorer_service.db.connection.reset_mock()
+
+        top, jobs = scorer_service._get_matches_fused("i know python", [1.0, 0.0])
+
+        assert mock_cursor.execute.call_count == 1
+        assert [c["category"] for c in top] == ["Python Developer", "Data Engineer", "Chef"]
+        assert [j["job_id"] for j in jobs["Python Developer"]] == ["j1"]
+        assert jobs["Python Developer"][0]["company"] == "Acme"
+        assert jobs["Python Developer"][0]["apply_link"] == "#"  # missing key -> default
+        assert jobs["Chef"] == []
+        assert "Data Engineer" not in jobs  # left to _stage2_lookups
+
+    def test_stage2_lookups_fetch_only_missing_fused_jobs(self, scorer_service):
+        """
+        A hybrid winner outside the fused lead set still gets its jobs from the
+        Stage 2 batch; jobs the fused query already returned are kept as-is.
+        """
+        meta = ("Acme", None, None, None, None)
+        mock_cursor = scorer_service.db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [
+            (1, False, "j9", "Python Dev", "Pune", *meta, 0.99),
+            (2, False, "j2", "Data Eng", "Goa", *meta, 0.80),
+        ]
+        mock_cursor.execute.reset_mock()
+        scorer_service._job_matrix = None
+        fused = {"Python Developer": []}
+
+        jobs, _ = scorer_service._stage2_lookups(["Python Developer", "Data Engineer"], [1.0, 0.0], fused)
+
+        assert mock_cursor.execute.call_args[0][1][3] > 0  # jobs requested, not misses only
+        assert jobs["Python Developer"] == []
+        assert [j["job_id"] for j in jobs["Data Engineer"]] == ["j2"]
+
+    def test_stage2_lookups_single_round_trip_on_pgvector(self, scorer_service):
+        """
+        Without the RAM job matrix, jobs + misses for every category come back from
+        ONE statement and are split per category (empty misses -> default titles).
+        """
+        meta = ("Acme", None, None, None, None)  # company, link, salary, source, posted_at
+        mock_cursor = scorer_service.db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [
+            # (term_idx, is_miss, job_id, job_title, location, *meta, conf)
+            (1, False, "j1", "Python Dev", "Pune", *meta, 0.95),
+            (1, True, None, "Chef Role", None, *(None,) * 5, 0.05),
+            (2, False, "j2", "Data Eng", "Goa", *meta, 0.80),
+        ]
+        mock_cursor.execute.reset_mock()
+        scorer_service._job_matrix = None
+
+        jobs, misses = scorer_service._stage2_lookups(["Python Developer", "Data Engineer"], [1.0, 0.0])
+
+        assert mock_cursor.execute.call_count == 1
+        assert mock_cursor.execute.call_args[0][1][1] == ["%Python%", "%Data%"]
+        assert [j["job_id"] for j in jobs["Python Developer"]] == ["j1"]
+        assert [j["job_id"] for j in jobs["Data Engineer"]] == ["j2"]
+        assert misses == {"Python Developer": ["Chef Role"],
+                          "Data Engineer": ["Senior Role", "Principal Engineer", "Architect"]}
+
+    def test_embedding_cache_skips_repeat_encode(self, scorer_service):
+        """
+        A re-uploaded resume (same hash) must not hit the transformer twice.
+        """
+        first = scorer_service._embed("hash-1", "I know Python")
+        second = scorer_service._embed("hash-1", "I know Python")
+
+        assert scorer_service.encoder.encode_batch.call_count == 1
+        assert first.dtype == np.float32
+        assert np.array_equal(first, second)
+
+    def test_uncached_upload_reuses_embedding_by_text(self, scorer_service):
+        """
+        Callers without a file hash still hit the cache: the key is the text itself.
+        """
+        scorer_service.encoder.encode_batch.reset_mock()
+        with patch.object(scorer_service, "_extract_user_skills", return_value=[]):
+            scorer_service.get_recommendations("I know Python")
+            scorer_service.get_recommendations("I know Python")
+
+        assert scorer_service.encoder.encode_batch.call_count == 1
+
+    def test_insight_embed_reuses_scored_upload(self, scorer_service):
+        """
+        Uploads are cached by file hash; the per-category insight calls that follow only
+        send the text -> embed_text() must be a cache hit, not another forward pass.
+        """
+        scorer_service.encoder.encode_batch.reset_mock()
+        with patch.object(scorer_service, "_extract_user_skills", return_value=[]):
+            scorer_service.get_recommendations_cached("sha256-of-file", "I know Python")
+        for _ in range(3):
+            vec = scorer_service.embed_text("I know Python")
+
+        assert scorer_service.encoder.encode_batch.call_count == 1
+        assert vec.dtype == np.float32
+
+    def test_in_memory_stage2_matches_sql_semantics(self, scorer_service):
+        """
+        The RAM job matrix must behave like the pgvector query:
+        ILIKE-style filter on category/title, cosine ordering, (title, company)
+        dedup, 50% floor.
+        """
+        meta = ("Acme", None, None, None, None)  # company, link, salary, source, posted_at
+        scorer_service.db.connection.reset_mock()
+        scorer_service._job_matrix = _JobMatrix([
+            ("j1", "Python Developer", "Software", "Pune", *meta),
+            ("j2", "Senior Python Dev", "Software", "Delhi", *meta),
+            ("j3", "Python Intern", "Software", "Goa", *meta),
+            ("j4", "Chef", "Hospitality", "Goa", *meta),
+            ("j5", "python developer", "Software", "Pune", *meta),
+        ], np.array([
+            [1.0, 0.0],  # j1: cos 1.0
+            [0.8, 0.6],  # j2: cos 0.8
+            [0.0, 1.0],  # j3: cos 0.0 -> below floor
+            [1.0, 0.0],  # j4: filtered out
+            [0.6, 0.8],  # j5: re-post of j1 -> dropped
+        ]))
+
+        jobs = scorer_service._get_job_postings("Python Engineer", [1.0, 0.0])
+
+        assert [j["job_id"] for j in jobs] == ["j1", "j2"]
+        assert jobs[0]["match_confidence"] == 100.0
+        scorer_service.db.connection.assert_not_called()
+
+    def test_job_matrix_loads_in_chunks(self, scorer_service):
+        """
+        refresh_job_matrix copies each fetchmany() batch into one float32 matrix,
+        including rows ingested between the COUNT and the stream.
+        """
+        meta = ("Acme", None, None, None, None)
+        vec = lambda i: np.eye(768, dtype=np.float32)[i] * 2.0
+        mock_cursor = scorer_service.db.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchone.return_value = (2,)
+        mock_cursor.fetchmany.side_effect = [
+            [("j1", "Dev", "Software", "Pune", *meta, vec(0)), ("j2", "Ops", "Software", "Goa", *meta, vec(1))],
+            [("j3", "QA", "Software", "Delhi", *meta, vec(2))],  # arrived after the COUNT
+            [],
+        ]
+
+        scorer_service.refresh_job_matrix()
+
+        matrix = scorer_service._job_matrix
+        assert matrix.ids == ["j1", "j2", "j3"]
+        assert matrix.details[2] == meta
+        assert matrix.E.dtype == np.float32 and matrix.E.shape == (3, 768)
+        assert np.allclose(matrix.E[:, :3], np.eye(3))  # L2-normalized
+
+    def test_embed_batch_single_forward_pass(self, scorer_service):
+        """
+        Bulk uploads: every uncached resume goes through ONE encode_batch call,
+        and cached ones are not re-encoded.
+        """
+        scorer_service._embed_cache["seen"] = np.array([0.0, 1.0], dtype=np.float32)
+        scorer_service.encoder.encode_batch.reset_mock()
+        scorer_service.encoder.encode_batch.return_value = [[1.0, 0.0], [0.6, 0.8]]
+
+        vectors = scorer_service.embed_batch(["a", "seen", "b"], ["text a", "text seen", "text b"])
+
+        scorer_service.encoder.encode_batch.assert_called_once()
+        assert scorer_service.encoder.encode_batch.call_args[0][0] == ["text a", "text b"]
+        assert np.allclose(np.stack(vectors), [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]])
+
+    def test_services_share_one_encoder_and_parser(self, scorer_service):
+        """
+        Building another service (scripts, tests, extra helpers) must reuse the
+        loaded MPNet weights and parser instead of loading them again.
+        """
+        with patch("app.services.score_resume.PostgresClient"):
+            other = ResumeScorerService()
+
+        assert other.encoder is scorer_service.batcher.encoder
+        assert other.parser_helper is scorer_service.parser_helper
+        other.batcher.close()
+
+    def test_deferred_matrices_leave_startup_off_the_db(self, scorer_service):
+        """
+        load_matrices=False (the API lifespan) must not query Postgres while
+        constructing; both stages fall back to pgvector until the refreshes land.
+        """
+        with patch("app.services.score_resume.PostgresClient") as MockDB:
+            other = ResumeScorerService(load_matrices=False)
+
+        MockDB.return_value.connection.assert_not_called()
+        assert other._role_matrix is None and other._job_matrix is None
+        other.batcher.close()
@@ -0,0 +1,181 @@
+"""
+Ensures AIInsightEngine keeps its Groq prefix stable and its graph lookups cached.
+"""
+
+import pytest
+import json
+import sys
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# --- SETUP PATHS ---
+root_dir = Path(__file__).resolve().parent.parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.append(str(root_dir))
+
+import numpy as np
+from app.services import ai_insight
+from app.services.ai_insight import AIInsightEngine, SYSTEM_PROMPT, _SemanticInsightCache
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+class TestPromptPrefix:
+
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        with patch("groq.AsyncGroq"), \
+             patch("neo4j.GraphDatabase"):
+            engine = AIInsightEngine()
+            engine.driver.execute_query.return_value = ([], None, None)
+            engine.groq_client.chat.completions.create = AsyncMock()
+            reply = engine.groq_client.chat.completions.create.return_value
+            reply.choices = [MagicMock()]
+            reply.choices[0].message.content = json.dumps({"strength_analysis": "ok"})
+            yield engine
+
+    def test_system_prompt_is_normalized(self):
+        assert SYSTEM_PROMPT == SYSTEM_PROMPT.strip()
+        assert all(line == line.rstrip() for line in SYSTEM_PROMPT.splitlines())
+
+    def test_static_prefix_identical_across_requests(self, engine):
+        asyncio.run(engine.generate_insight("Resume A", ["Python"], "Data Scientist", ["DS"], ["ML Eng"]))
+        asyncio.run(engine.generate_insight("Resume B", ["Java"], "Backend Developer", ["BE"], ["SRE"]))
+
+        calls = engine.groq_client.chat.completions.create.call_args_list
+        first, second = (c.kwargs["messages"] for c in calls)
+        assert first[0] == second[0]
+        assert first[0]["content"] == SYSTEM_PROMPT
+        # All per-request data lives after the static prefix
+        assert "Resume A" in first[1]["content"] and "Resume A" not in first[0]["content"]
+
+    def test_user_message_puts_resume_last(self, engine):
+        """Same category context -> identical user-message prefix up to the resume text."""
+        graph = {"missing_concepts_str": "MLOps", "missing_tools_str": "Docker", "bridge_relations_str": ""}
+        a = engine._build_user_message("Resume $A", "DS", ["X"], ["Y"], graph)
+        b = engine._build_user_message("Resume B", "DS", ["X"], ["Y"], graph)
+
+        prefix = a[:a.index("<resume_summary>")]
+        assert b.startswith(prefix) and "<missing_tools_with_context>Docker" in prefix
+        assert "<resume_summary>Resume $A</resume_summary>" in a
+
+    def test_graph_context_cached_per_skill_set(self, engine):
+        """Same category + same skills (any order) -> one Cypher round-trip until invalidated."""
+        engine._fetch_graph_context(["Python", "SQL"], "Data Scientist")
+        engine._fetch_graph_context(["SQL", "Python", "Python"], "Data Scientist")
+        assert engine.driver.execute_query.call_count == 1
+
+        engine.invalidate_graph_cache()
+        engine._fetch_graph_context(["Python", "SQL"], "Data Scientist")
+        assert engine.driver.execute_query.call_count == 2
+
+    def test_graph_failures_are_not_cached(self, engine):
+        engine.driver.execute_query.side_effect = [RuntimeError("boom"), ([], None, None)]
+
+        assert engine._fetch_graph_context(["Python"], "DS")["missing_tools_str"] == ""
+        assert engine._fetch_graph_context(["Python"], "DS")["missing_tools_str"] == "None"
+
+    def test_connectivity_verified_lazily_once(self, engine):
+        """Construction does no Neo4j I/O; the first query verifies, later ones don't."""
+        engine.driver.verify_connectivity.assert_not_called()
+
+        engine.driver.verify_connectivity.side_effect = [RuntimeError("down"), None]
+        engine._fetch_graph_context(["Python"], "DS")   # fails -> not cached, retried
+        engine._fetch_graph_context(["Python"], "DS")
+        engine._fetch_graph_context(["Java"], "DS")
+        assert engine.driver.verify_connectivity.call_count == 2
+        assert engine.driver.execute_query.call_count == 2
+
+    def test_embedding_and_graph_lookup_overlap(self, engine):
+        """Cache-probe embedding and Neo4j fetch are independent -> both in flight at once."""
+        import threading
+        barrier = threading.Barrier(2, timeout=5)
+
+        def embed(text):
+            barrier.wait()
+            return [1.0, 0.0]
+
+        def graph(*args, **kwargs):
+            barrier.wait()
+            return ([], None, None)
+
+        engine.embed_fn = embed
+        engine.driver.execute_query.side_effect = graph
+
+        insight = asyncio.run(engine.generate_insight("Resume", ["Python"], "DS", ["A"], ["B"]))
+
+        assert insight == {"strength_analysis": "ok"}
+        engine.groq_client.chat.completions.create.assert_called_once()
+
+    def test_stream_concatenates_to_same_json(self, engine):
+        """Streaming must yield deltas that join into the exact JSON generate_insight parses."""
+        payload = json.dumps({"strength_analysis": "ok", "hard_truth_gaps": "x", "strategic_pivot": "y"})
+        chunks = []
+        for piece in (payload[:10], payload[10:25], payload[25:]):
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = piece
+            chunks.append(chunk)
+        engine.groq_client.chat.completions.create.return_value = _aiter(chunks)
+
+        out = "".join(asyncio.run(_collect(engine.stream_insight("Resume", ["Python"], "DS", ["A"], ["B"]))))
+
+        assert json.loads(out) == json.loads(payload)
+        assert engine.groq_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    def test_semantic_cache_skips_llm_for_near_duplicate(self, engine):
+        """Same prompt context + resume embedding above threshold -> no second Groq call."""
+        vectors = {"Resume v1": [1.0, 0.0], "Resume v2": [0.99, 0.141], "Other": [0.0, 1.0]}
+        engine.embed_fn = lambda text: vectors[text]
+        create = engine.groq_client.chat.completions.create
+
+        first = asyncio.run(engine.generate_insight("Resume v1", ["Python"], "DS", ["A"], ["B"]))
+        second = asyncio.run(engine.generate_insight("Resume v2", ["Python"], "DS", ["A"], ["B"]))
+        assert create.call_count == 1
+        assert second == first
+
+        asyncio.run(engine.generate_insight("Other", ["Python"], "DS", ["A"], ["B"]))        # different resume
+        asyncio.run(engine.generate_insight("Resume v1", ["Python"], "DS", ["A"], ["C"]))    # different misses
+        assert create.call_count == 3
+
+class TestSemanticInsightCache:
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(ai_insight.time, "monotonic", lambda: now[0])
+        return now
+
+    def test_keys_bounded_lru(self, clock):
+        cache = _SemanticInsightCache(threshold=0.9, ttl_s=60, max_per_key=4, max_keys=2)
+        v = np.array([1.0, 0.0])
+        cache.put(("a",), v, {"x": 1})
+        cache.put(("b",), v, {"x": 2})
+        assert cache.get(("a",), v) == {"x": 1}   # "a" becomes most recently used
+        cache.put(("c",), v, {"x": 3})            # evicts "b"
+        assert list(cache._buckets) == [("a",), ("c",)]
+        assert cache.get(("b",), v) is None
+        assert ("b",) not in cache._buckets       # misses don't create buckets
+
+    def test_put_sweeps_expired_buckets(self, clock):
+        cache = _SemanticInsightCache(threshold=0.9, ttl_s=60, max_per_key=4, max_keys=10)
+        v = np.array([1.0, 0.0])
+        cache.put(("old",), v, {"x": 1})
+        clock[0] += 61
+        cache.put(("new",), v, {"x": 2})
+        assert list(cache._buckets) == [("new",)]
+
+    def test_payload_is_copied(self, clock):
+        cache = _SemanticInsightCache(threshold=0.9, ttl_s=60, max_per_key=4, max_keys=10)
+        v = np.array([1.0, 0.0])
+        payload = {"gaps": ["k8s"]}
+        cache.put(("k",), v, payload)
+        payload["gaps"].append("mutated after put")
+        hit = cache.get(("k",), v)
+        hit["gaps"].append("mutated by caller")
+        assert cache.get(("k",), v) == {"gaps": ["k8s"]}
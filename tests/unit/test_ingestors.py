@@ -0,0 +1,107 @@
+"""
+Ensures the resume ingestors turn raw upload bytes into clean text.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# --- SETUP PATHS ---
+root_dir = Path(__file__).resolve().parent.parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.append(str(root_dir))
+
+from data_ingestion.resume_ingestion.factory import IngestorFactory
+from data_ingestion.resume_ingestion.txt_ingestor import TXTIngestor
+
+class TestIngestorFactory:
+
+    def test_extension_lookup_is_normalized(self):
+        """'.PDF', 'pdf' and '.pdf' must all resolve to the same ingestor."""
+        factory = IngestorFactory()
+        assert factory.get_ingestor(".PDF") is factory.get_ingestor("pdf")
+        assert factory.get_ingestor("pdf") is factory.get_ingestor(".pdf")
+
+    def test_txt_ingestor_resolution(self):
+        assert isinstance(IngestorFactory().get_ingestor(".txt"), TXTIngestor)
+
+    def test_backends_are_imported_on_first_use(self):
+        """Importing the factory must not pull in fitz / python-docx until a PDF/DOCX arrives."""
+        import subprocess
+        code = (
+            "import sys; from data_ingestion.resume_ingestion.factory import IngestorFactory; "
+            "IngestorFactory.get_ingestor('.txt'); "
+            "assert 'fitz' not in sys.modules and 'docx' not in sys.modules, 'eager import'; "
+            "IngestorFactory.get_ingestor('.pdf'); assert 'fitz' in sys.modules"
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=root_dir, check=True)
+
+    def test_unsupported_extension_raises(self):
+        with pytest.raises(ValueError, match="Unsupported file type"):
+            IngestorFactory().get_ingestor(".exe")
+
+
+class TestTXTIngestor:
+
+    def test_decode_and_strip(self):
+        assert TXTIngestor().extract(b"  Python Developer\n") == "Python Developer"
+
+    def test_oversize_input_is_truncated(self):
+        text = TXTIngestor().extract(b"a" * 2_000_000)
+        assert len(text) == 1_000_000
+
+    def test_truncation_never_splits_into_garbage(self):
+        """A multi-byte char cut at the 1 MB boundary is dropped, not decoded as junk."""
+        text = TXTIngestor().extract(b"a" * 999_999 + "\u00e9".encode("utf-8") + b"tail")
+        assert text == "a" * 999_999
+
+    def test_str_input_is_passed_through(self):
+        assert TXTIngestor().extract("  Python Developer\n") == "Python Developer"
+
+
+class TestDOCXIngestor:
+
+    def test_matches_python_docx_paragraph_text(self):
+        """lxml fast path must yield exactly what docx.Document(...).paragraphs did."""
+        import io
+        import docx
+        from docx.enum.text import WD_BREAK
+        from data_ingestion.resume_ingestion.docx_ingest import DOCXIngestor
+
+        doc = docx.Document()
+        doc.add_paragraph("  Jane Doe  ")
+        p = doc.add_paragraph("Pyth")
+        p.add_run("on").bold = True
+        p.add_run("\tSQL")
+        p.add_run("Line one").add_break()
+        p.add_run("Line two").add_break(WD_BREAK.PAGE)
+        doc.add_paragraph("")
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = "table text"  # not in doc.paragraphs
+        doc.add_paragraph("• Built ML pipelines & APIs <fast>")
+        buf = io.BytesIO()
+        doc.save(buf)
+        content = buf.getvalue()
+
+        expected = "\n".join(p.text for p in docx.Document(io.BytesIO(content)).paragraphs).strip()
+        assert DOCXIngestor().extract(content) == expected
+
+    def test_corrupt_bytes_raise_value_error(self):
+        from data_ingestion.resume_ingestion.docx_ingest import DOCXIngestor
+
+        with pytest.raises(ValueError, match="Failed to parse DOCX"):
+            DOCXIngestor().extract(b"not a zip")
+
+
+class TestPDFIngestor:
+
+    def test_pages_joined_in_order(self):
+        import fitz
+        from data_ingestion.resume_ingestion.pdf_ingest import PDFIngestor
+
+        doc = fitz.open()
+        for text in ("Jane Doe", "Python Developer", "Skills: SQL"):
+            doc.new_page().insert_text((72, 72), text)
+        content = doc.tobytes()
+        doc.close()
+
+        assert PDFIngestor().extract(content) == "Jane Doe\n\nPython Developer\n\nSkills: SQL"
@@ -7,7 +7,7 @@ root_dir = Path(__file__).resolve().parent.parent.parent
 if str(root_dir) not in sys.path:
     sys.path.append(str(root_dir))
 
-from src.parser.utils import extract_skills
+from src.parser.utils import extract_skills, extract_email
 
 class TestResumeParser:
     """
@@ -62,4 +62,14 @@ class TestResumeParser:
         
         # Implementation returns the token found in the list (which is lowercase)
         assert "python" in extracted
-        assert "docker" in extracted
\ No newline at end of file
+        assert "docker" in extracted
+
+    def test_extract_skills_set_and_list_vocab_agree(self, dummy_resume_text, mock_skills_db):
+        """The engine hands over a frozenset; a plain list must give the same skills."""
+        assert sorted(extract_skills(dummy_resume_text, frozenset(mock_skills_db))) == \
+            sorted(extract_skills(dummy_resume_text, mock_skills_db))
+
+    def test_extract_email_returns_first_address(self):
+        text = "John Doe | john.doe@example.com | backup: jd@mail.co.in"
+        assert extract_email(text) == "john.doe@example.com"
+        assert extract_email("no contact details here") is None
@@ -2,6 +2,9 @@
 Ensures your JSON-to-CSV cleaning doesn't corrupt data before it hits the DB.
 """
 
+import re
+import json
+import logging
 import pytest
 import pandas as pd
 import sys
@@ -14,7 +17,7 @@ if str(root_dir) not in sys.path:
     sys.path.append(str(root_dir))
 
 # Import the SPECIFIC function we just created
-from data_ingestion.processors.process_data import transform_raw_data, REQUIRED_SCHEMA
+from data_ingestion.processors.process_data import transform_raw_data, extract_jobs, new_raw_columns, clean_text, write_processed_csv, load_raw_rows, REQUIRED_SCHEMA, RAW_ROWS_FILE, RAW_ROWS_MANIFEST
 
 class TestDataProcessor:
     
@@ -75,4 +78,133 @@ class TestDataProcessor:
         assert processed_df.iloc[0]["salary"] == "Not mentioned"
 
         # E. Check Column Order matches REQUIRED_SCHEMA
-        assert list(processed_df.columns) == REQUIRED_SCHEMA
\ No newline at end of file
+        assert list(processed_df.columns) == REQUIRED_SCHEMA
+
+    def test_extract_jobs_flattens_response(self):
+        """
+        The ingest stage and the JSON fallback share extract_jobs, so one SerpAPI
+        page must flatten to aligned columns carrying the search context and first apply link.
+        """
+        response = {
+            "search_parameters": {"q": "devops", "location_requested": "Remote"},
+            "search_metadata": {"created_at": "2026-01-01 10:00:00 UTC"},
+            "jobs_results": [
+                {
+                    "job_id": "101", "title": "DevOps Engineer", "company_name": "Tech Corp",
+                    "detected_extensions": {"salary": "10 LPA"},
+                    "apply_options": [{"link": "https://a"}, {"link": "https://b"}],
+                },
+                {"job_id": "102", "title": "SRE"},
+            ],
+        }
+
+        cols = new_raw_columns()
+        assert extract_jobs(response, cols) == 2
+
+        assert cols["job_id"] == ["101", "102"]
+        assert cols["salary"] == ["10 LPA", None]
+        assert cols["apply_link"] == ["https://a", None]
+        assert cols["search_term"] == ["devops", "devops"]
+        assert cols["search_location"] == ["Remote", "Remote"]
+        assert {len(v) for v in cols.values()} == {2}
+        assert set(cols) | {"ingestion_month", "data_source", "search_engine", "category"} == set(REQUIRED_SCHEMA)
+
+    def test_transform_cleans_text_columns_like_clean_text(self):
+        """Every text column goes through clean_text cell by cell, odd values included."""
+        values = ["  Tech Corp  \n", "• Python\r\n• SQL … done", "a\t\tb", "", "   ", None, 42, "·"]
+        df = pd.DataFrame({
+            "job_id": [str(i) for i in range(len(values))],
+            "title": values, "company_name": values, "description": values,
+        })
+
+        processed = transform_raw_data(df, run_month="2026-01").sort_values("job_id")
+
+        assert processed["company_name"].tolist() == [clean_text(v) for v in values]
+
+    def test_fills_and_lineage_columns(self):
+        """Missing salary -> 'Not mentioned', any other gap -> 'Unknown', lineage stamped over raw values."""
+        df = pd.DataFrame({
+            "job_id": ["1", "2"], "salary": [None, "₹5L"], "location": [float("nan"), "Pune"],
+            "data_source": ["stale", "stale"],
+        })
+
+        processed = transform_raw_data(df, run_month="2026-01")
+
+        assert processed["salary"].tolist() == ["Not mentioned", "₹5L"]
+        assert processed["location"].tolist() == ["Unknown", "Pune"]
+        assert processed["category"].tolist() == ["Unknown", "Unknown"]
+        assert set(processed["data_source"]) == {"serpapi"}
+        assert set(processed["ingestion_month"]) == {"2026-01"}
+        assert not processed.isna().any().any()
+
+    def test_single_pass_clean_text_matches_stepwise_cleaning(self):
+        """
+        The fused regex must equal the original three steps: newlines -> space,
+        bullets dropped, whitespace runs collapsed, then strip.
+        """
+        def stepwise(text):
+            text = text.replace("\n", " ").replace("\r", " ")
+            text = re.sub(r'[\u2022\u2026•·]', '', text)
+            return re.sub(r'\s+', ' ', text).strip()
+
+        cases = ["a\tb", "a •  b", "a•b", "•• x ••", "x \n\r\n y", " … ", "plain words here", "a\u3000\u0085b"]
+        assert [clean_text(c) for c in cases] == [stepwise(c) for c in cases]
+
+    def test_arrow_csv_round_trips_like_to_csv(self, tmp_path):
+        """Downstream stages read the processed CSV with pd.read_csv: same frame either way."""
+        pytest.importorskip("pyarrow")
+        raw = pd.DataFrame({
+            "job_id": ["2", "1"], "title": ['Say "hi", ML', "Data\nEngineer"],
+            "company_name": ["Acme, Inc", None], "description": ["x" * 5000, "Unknown"],
+        })
+        df = transform_raw_data(raw, run_month="2026-01")
+
+        df.to_csv(tmp_path / "pandas.csv", index=False)
+        write_processed_csv(df, tmp_path / "arrow.csv")
+
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "arrow.csv"), pd.read_csv(tmp_path / "pandas.csv"))
+
+    def test_chunked_labeling_matches_single_pass(self, tmp_path):
+        """label_in_chunks must write the same CSV as labeling the whole file at once."""
+        pytest.importorskip("mlflow")
+        from src.label_jobs import label_in_chunks
+
+        class EchoModel:
+            def predict(self, X):
+                return [x.split()[0] if x.strip() else "none" for x in X]
+
+        src = pd.DataFrame({
+            "job_id": ["1", "2", "3", "4", "5"],
+            "title": ["ML Engineer", None, "Data Analyst", "SRE", "Dev"],
+            "description": ["a", "b", None, "c, d", "e\nf"],
+            "salary": ["10", None, "12.5", "7", "8"],
+        })
+        src.to_csv(tmp_path / "in.csv", index=False)
+
+        assert label_in_chunks(EchoModel(), tmp_path / "in.csv", tmp_path / "out.csv", chunksize=2) == 5
+        single = pd.read_csv(tmp_path / "in.csv")
+        single["category"] = EchoModel().predict(single["title"].fillna("") + " " + single["description"].fillna(""))
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "out.csv"), single)
+
+        # Headers-only input still produces a headers-only output
+        src.head(0).to_csv(tmp_path / "empty.csv", index=False)
+        assert label_in_chunks(EchoModel(), tmp_path / "empty.csv", tmp_path / "empty_out.csv") == 0
+        assert list(pd.read_csv(tmp_path / "empty_out.csv").columns) == list(src.columns)
+
+    def test_raw_rows_fall_back_to_json_when_parquet_misses_pages(self, tmp_path):
+        """A same-day rerun's parquet only covers its own pages: earlier pages must not be dropped."""
+        for name, job_id in (("a_p1.json", "1"), ("b_p2.json", "2")):
+            (tmp_path / name).write_text(json.dumps({"jobs_results": [{"job_id": job_id, "title": "T"}]}))
+        (tmp_path / RAW_ROWS_FILE).write_bytes(b"not read")   # newer than the pages
+        (tmp_path / RAW_ROWS_MANIFEST).write_text("b_p2.json")
+
+        rows = load_raw_rows(tmp_path, logging.getLogger("test"))
+        assert sorted(rows["job_id"]) == ["1", "2"]
+
+    def test_raw_rows_use_parquet_when_manifest_matches(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        (tmp_path / "a_p1.json").write_text(json.dumps({"jobs_results": [{"job_id": "1", "title": "T"}]}))
+        pd.DataFrame({"job_id": ["from-parquet"]}).to_parquet(tmp_path / RAW_ROWS_FILE, index=False)
+        (tmp_path / RAW_ROWS_MANIFEST).write_text("a_p1.json")
+
+        assert list(load_raw_rows(tmp_path, logging.getLogger("test"))["job_id"]) == ["from-parquet"]